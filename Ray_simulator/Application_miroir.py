@@ -1,78 +1,47 @@
-import matplotlib.pyplot as plt
 import numpy as np
-import matplotlib.widgets as wdg
+import threading
+from collections import OrderedDict
+
+from moteur import faisceau, tracer
+from rendu import dessiner, actualiser, dessiner_surface, points_contour
+from analyse import aberration_spherique, caustique, meilleur_foyer
+
+#Objets de l'application, utilisés par les objets créés avec une figure
+lst_ray = []
+lst_miroir = []
+lst_source = []
 
 class rayon:
+    #Pas de __dict__ ni de référence à la figure : les segments tracés sont stockés dans les tableaux de resultat
+    __slots__ = ("x", "y", "teta", "color", "direction", "origine", "resultat")
+
     def __init__(self,figure, x =0, y=0, teta=0, color = "k", direction = True, origine = None):
         self.x = x  #abscisse d'origine
         self.y =y   #ordonnée d'origine
         self.teta = teta    #angle du rayon par rapport à l'axe des abscisses
         self.color = color  #Couleur du rayon
         self.direction = direction  #Direction du rayon
-        self.origine = origine      #Permet de savoir l'origine du rayon (de quel miroir il provient), utile pour le débogage
-        
-        self.fig, self.ax = figure  #Figure sur laquelle tracer
-        
-        
-        
-        if self.direction: #Défini le vecteur x conrrespondant a la direction du rayon
-            self.x_array = np.linspace(self.x,self.x+20)
-        else:
-            self.x_array = np.linspace(self.x, self.x-20)
-        
-        if origine != None:
+        self.origine = -1 if origine is None else int(origine)    #Indice du miroir d'origine (-1 = source), utile pour le débogage
+        self.resultat = None    #Segments parcourus, calculés par check()
+
+        if origine is not None:
             self.color="C1"
         
         
-        #On appelle la méthode check() permettant de déterminer si le rayon entre en contact avec un miroir
-        self.check()
-        
-    def trace(self):
-        #méthode traçant le rayon
-        y = (self.x_array-self.x)*np.tan(self.teta) +self.y #vecteur y
+        #On appelle la méthode check() permettant de déterminer les contacts du rayon et des rayons qui en sont issus
+        if figure is not None:
+            self.check(figure[1])
         
-        self.ax.plot(self.x_array, y,self.color) #plot
+    def trace(self, ax):
+        #méthode traçant le rayon et les rayons réfléchis/réfractés
+        dessiner(ax, self.resultat, self.color)
         
-    def check(self):
-        for miroir in lst_miroir: #On regarde si le rayon entre en contact avec chaque miroir
-            
-            #Résolution de l'équation
-            A = 1+(np.tan(self.teta)**2)
-            B = -2*(miroir.x-miroir.r) -2*self.x*(np.tan(self.teta)**2)+2*self.y*np.tan(self.teta)
-            C = (miroir.x-miroir.r)**2 + (self.x**2)*(np.tan(self.teta)**2) - 2*self.y*self.x*np.tan(self.teta) + (self.y**2) - (miroir.r**2)
-
-            delta = (B**2)-(4*A*C)
-            #Si delta négatif, pas de solution, on passe le tour de boucle
-            if delta <0:
-                continue
-            #Si r>0, la solution est sur la droite du "cercle", sinon elle est sur la gauche du "cercle"
-            if miroir.r>0:
-                X1 = (-B+np.sqrt(delta))/(2*A)
-            else:
-                X1 = (-B-np.sqrt(delta))/(2*A)
-            Y1 = (X1-self.x)*np.tan(self.teta) +self.y  #Calcul de l'ordonnée du point de contact
-
-            if round(X1) == round(self.x): #Sécurité pour éviter de créer un deuxième rayon réfléchi au point de départ d'un rayon réfléchi
-                continue
-            
-            #On vérifie si le programme n'as pas choisi la mauvaise solution, et que la solution est bien sur le miroir
-            if Y1 < miroir.max and Y1 > miroir.min and (((self.direction == False) and (self.x > miroir.x)) or ((self.direction == True) and (self.x < miroir.x)))  and round(X1,1) >= round(np.min(miroir.xc),1) and round(X1,1) <= round(np.max(miroir.xc),1) and X1 <= max(self.x_array):
-                
+    def check(self, ax):
+        #Méthode vérifiant si le rayon entre en contact avec un miroir
+        #Le rayon est traité comme un faisceau d'un seul rayon, propagé génération par génération sans récursion
+        self.resultat = tracer(faisceau(self.x, self.y, self.teta, self.direction), [], lst_miroir)
 
-                self.x_array = np.linspace(self.x,X1,100)  #On créé le vecteur x entre le point de départ et d'arrivée
-                teta_rayon = np.arcsin(Y1/miroir.r)        #On calcule l'angle de la normale
-                teta_nouveau = -np.pi + 2*teta_rayon -self.teta    #On calcule l'angle du rayon réfléchi
-
-                teta_nouveau = (teta_nouveau + np.pi) % (2 * np.pi) - np.pi #transforme la valeur de l'angle entre -pi,pi
-                if abs(teta_nouveau) > np.pi/2 and abs(teta_nouveau) < 3*np.pi/2: #On définit la direction du rayon en fonction de son angle
-                    direction = False
-                else:
-                    direction = True
-
-                #On créé un nouveau rayon (réfléchi) en fonction du point de contact avec le miroir, l'angle et sa direction
-                lst_ray.append(rayon((self.fig,self.ax),X1,Y1, teta_nouveau, origine = miroir, direction = direction))
-
-        self.trace()    #On trace le rayon incident
+        self.trace(ax)    #On trace le rayon incident et ses descendants
 
 class source:
     def __init__(self,figure, x, y, angle, N, inf = False, height = 0):
@@ -84,17 +53,19 @@ class source:
         self.infiny = inf       #Source à l'infinie
         self.height = height    #Hauteur de création des rayons en mode infini
 
-        self.create_ray()       #Appel de la méthode pour créer et tracer les rayons
+        if self.figure is not None:
+            self.create_ray()       #Appel de la méthode pour créer et tracer les rayons
 
-    def create_ray(self):
-        lst_angle = np.linspace(-self.alpha, self.alpha, self.N)    #Liste des angles pour chaque rayon de la source
+    def rayons(self):
+        #Tous les rayons de la source sont regroupés dans un faisceau traité en une seule passe par miroir
+        if self.infiny: #Si la source est à l'infini, les rayons d'angle 0rad sont répartis sur la hauteur
+            return faisceau(self.x, np.linspace(-self.height/2, self.height/2, self.N), 0)
+        else:   #Sinon les rayons partent du même point avec des angles répartis sur l'ouverture
+            return faisceau(self.x, self.y, np.linspace(-self.alpha, self.alpha, self.N))
 
-        if self.infiny: #Si la source est à l'infini
-            for y in np.linspace(-self.height/2, self.height/2, self.N):
-                lst_ray.append(rayon(self.figure, self.x, y, 0))    #Création d'un rayon d'angle 0rad
-        else:
-            for angle in lst_angle:
-                lst_ray.append(rayon(self.figure, self.x, self.y, angle)) #Sinon on trace un rayon avec l'angle correspondant
+    def create_ray(self):
+        #On propage le faisceau génération par génération puis on trace tous les segments
+        dessiner(self.figure[1], tracer(self.rayons(), [], lst_miroir))
 
 
     
@@ -104,56 +75,294 @@ class miroir:
         self.diametre = dia     #demi-diamètre d'ouverture
         self.r = r              #Rayon du miroir
         self.color = color      #Couleur du miroir
-        self.fig, self.ax = figure  #Figure sur laquelle tracer le miroir
+        self.fig, self.ax = figure if figure is not None else (None, None)  #Figure sur laquelle tracer le miroir (None = sans affichage)
 
-        self.max = int  #Initialisation des variables max et min
-        self.min = int
+        #Calcul des bornes du miroir une seule fois, sans échantillonner le cercle
+        self.max = abs(self.r)*np.sin(min(self.diametre, np.pi/2))     #Hauteur max et min du miroir
+        self.min = -self.max
+        fleche = abs(self.r)*(1 - np.cos(min(self.diametre, np.pi)))   #Profondeur du miroir selon l'axe des abscisses
+        if self.r > 0:
+            self.xmin, self.xmax = self.x - fleche, self.x
+        else:
+            self.xmin, self.xmax = self.x, self.x + fleche
                 
-        self.trace()    #On trace le miroir
+        if self.ax is not None:
+            self.trace()    #On trace le miroir
 
-    def trace(self):
-        teta = np.linspace(-self.diametre, self.diametre,1000)   #Vecteur teta correspondant à l'angle de chaque point du cercle par rapport à l'axe des x
-        
-        self.xc = self.r*np.cos(teta) - self.r + self.x #array des x
-        self.yc = self.r*np.sin(teta)   #array des y
+    def longueur(self):
+        #Longueur de l'arc du miroir
+        return 2*abs(self.r)*self.diametre
 
-        #Calcul de la hauteur max et min du miroir
-        self.max = np.max(self.yc)
-        self.min = -self.max
-        
-        self.ax.plot(self.xc, self.yc, color = self.color) #tracé du miroir
+    def contour(self, N = 1000):
+        #Points du miroir pour l'affichage, calculés seulement lorsque le miroir est tracé
+        teta = np.linspace(-self.diametre, self.diametre, N)   #Vecteur teta correspondant à l'angle de chaque point du cercle par rapport à l'axe des x
+        return self.r*np.cos(teta) - self.r + self.x, self.r*np.sin(teta)
+
+    def trace(self):
+        dessiner_surface(self.ax, self, color = self.color) #tracé du miroir, plus ou moins détaillé selon le zoom
         #self.ax.plot(self.x - self.r, 0,marker = "o", color = self.color) #Tracé du centre du miroir
         
         
 
+class cache_lru:
+    """ 
+    Cache des derniers résultats calculés, du moins récemment utilisé au plus récemment utilisé.
+    Les entrées les plus anciennes sont supprimées dès que le nombre d'entrées ou la mémoire occupée dépasse sa limite.
+
+    ----------
+    entrees_max : int
+        Nombre maximal de résultats conservés.
+    octets_max : float
+        Mémoire maximale occupée par les résultats conservés.
+    taille : function
+        Fonction retournant la mémoire occupée par un résultat (en octets).
+    """
+    def __init__(self, entrees_max = 128, octets_max = 256e6, taille = lambda valeur: 0):
+        self.entrees_max = entrees_max
+        self.octets_max = octets_max
+        self.taille = taille
+        self.entrees = OrderedDict()    #clé -> (résultat, taille)
+        self.octets = 0
+        self.verrou = threading.Lock()  #Le cache est utilisé par l'interface et par le thread de calcul
+
+    def __contains__(self, cle):
+        with self.verrou:
+            return cle in self.entrees
+
+    def obtenir(self, cle):
+        #Résultat associé à la clé (None s'il n'est pas en cache), qui devient le plus récemment utilisé
+        with self.verrou:
+            if cle not in self.entrees:
+                return None
+            self.entrees.move_to_end(cle)
+            return self.entrees[cle][0]
+
+    def ajouter(self, cle, valeur):
+        taille = self.taille(valeur)
+        with self.verrou:
+            if cle in self.entrees:
+                self.octets -= self.entrees.pop(cle)[1]
+            self.entrees[cle] = (valeur, taille)
+            self.octets += taille
+
+            #Suppression des entrées les moins récemment utilisées (la dernière ajoutée est toujours gardée)
+            while len(self.entrees) > 1 and (len(self.entrees) > self.entrees_max or self.octets > self.octets_max):
+                self.octets -= self.entrees.popitem(last = False)[1][1]
+
+
+class traceur_asynchrone:
+    """ 
+    Exécute les tracés dans un thread de calcul pour ne pas bloquer l'interface.
+    Une nouvelle demande remplace celle qui est en attente, et seul le résultat le plus récent est conservé.
+    Avec un cache, les demandes déjà calculées sont servies sans calcul et le thread, lorsqu'il est inactif,
+    calcule d'avance les paramètres donnés à anticiper().
+
+    ----------
+    calcul : function
+        Fonction appelée dans le thread de calcul avec les paramètres d'une demande, retourne le résultat à afficher.
+    cache : cache_lru
+        Cache des résultats, indexé par les paramètres des demandes (None pour ne rien conserver).
+    """
+    def __init__(self, calcul, cache = None):
+        self.calcul = calcul
+        self.cache = cache
+        self.condition = threading.Condition()
+        self.demande = None     #Demande en attente (numéro, paramètres), une seule à la fois
+        self.numero = 0         #Numéro de la dernière demande
+        self.dernier = 0        #Numéro du dernier résultat rendu disponible
+        self.resultat = None    #Dernier résultat terminé et pas encore récupéré (numéro, résultat)
+        self.anticipations = [] #Paramètres à calculer d'avance lorsqu'il n'y a pas de demande
+
+        threading.Thread(target = self.boucle, daemon = True).start()
+
+    def demander(self, *parametres):
+        #Remplace la demande en attente éventuelle, un résultat en cache est disponible immédiatement
+        resultat = None if self.cache is None else self.cache.obtenir(parametres)
+        with self.condition:
+            self.numero += 1
+            if resultat is None:
+                self.demande = (self.numero, parametres)
+                self.condition.notify()
+            else:
+                self.demande = None
+                self.publier(self.numero, resultat)
+
+    def anticiper(self, lst_parametres):
+        #Remplace la liste des calculs d'avance (les résultats vont seulement dans le cache)
+        if self.cache is None:
+            return
+        with self.condition:
+            self.anticipations = list(lst_parametres)
+            self.condition.notify()
+
+    def publier(self, numero, resultat):
+        #Un résultat plus ancien que le dernier rendu disponible est abandonné (à appeler avec self.condition)
+        if numero > self.dernier:
+            self.dernier = numero
+            self.resultat = (numero, resultat)
+
+    def boucle(self):
+        while True:
+            with self.condition:
+                while self.demande is None and not self.anticipations:
+                    self.condition.wait()
+                if self.demande is not None:
+                    (numero, parametres), self.demande = self.demande, None
+                else:
+                    numero, parametres = None, self.anticipations.pop(0)    #Calcul d'avance
+
+            if numero is None and parametres in self.cache:
+                continue
+            resultat = self.calcul(*parametres)
+            if self.cache is not None:
+                self.cache.ajouter(parametres, resultat)
+
+            if numero is not None:
+                with self.condition:
+                    self.publier(numero, resultat)
+
+    def recuperer(self):
+        #Retourne le dernier résultat terminé (None s'il n'y a rien de nouveau), à appeler depuis l'interface
+        with self.condition:
+            resultat, self.resultat = self.resultat, None
+        return None if resultat is None else resultat[1]
+
     
 if __name__ == "__main__":
+    #matplotlib et ses widgets ne sont chargés que pour l'interface
+    import matplotlib.pyplot as plt
+    import matplotlib.widgets as wdg
+
     fig = plt.subplots(figsize=(11,6))  #Création de la figure
 
-    #Listes vides que l'on va remplir par les objets
-    lst_ray = []
-    lst_miroir = []
-    lst_source = []
-    
-    def trace(ouverture, diametre, rayon, inf, N):
-        #On enlève tous les rayon/miroirs/sources des listes pour en créer des nouveaux
-        for ray in lst_ray:
-            lst_ray.remove(ray)
-        for sourcee in lst_source:
-            lst_source.remove(sourcee)
-        for miroire in lst_miroir:
-            lst_miroir.remove(miroire)
-        fig[1].cla()    #Clear de la figure
-
-        #Limites, grille, ratio des axes..
-        fig[1].set_xlim(-10,10)
-        fig[1].set_ylim(-7,7)
-        fig[1].grid(True)
-        fig[1].set_aspect("equal")
-
-        #On créé les objets miroir et source que l'on ajoute dans la liste correspondant
-        lst_miroir.append(miroir(position = 7, r=rayon, dia = diametre, figure = fig, color = "blue")) 
-        lst_source.append(source(fig,-10, 0,ouverture, N, inf = inf, height = 8))
+    #Limites, grille, ratio des axes..
+    fig[1].set_xlim(-10,10)
+    fig[1].set_ylim(-7,7)
+    fig[1].grid(True)
+    fig[1].set_aspect("equal")
+
+    #Artistes créés une seule fois : à chaque mise à jour seules leurs données changent
+    #Ils sont "animated" pour être exclus du tracé complet de la figure et redessinés seuls par blitting
+    ligne_miroir, = fig[1].plot([], [], color = "blue", animated = True)
+    collections_rayons = dessiner(fig[1], tracer(faisceau([], [], []), [], []), animated = True)
+    artistes = [ligne_miroir] + collections_rayons
+    fond = None     #Image de la figure sans les artistes animés
+
+    def zoom(ax):
+        #Le miroir est rééchantillonné selon le zoom
+        if lst_miroir:
+            ligne_miroir.set_data(*lst_miroir[0].contour(points_contour(ax, lst_miroir[0])))
+
+    fig[1].callbacks.connect("xlim_changed", zoom)
+
+    #Mode analyse : courbes d'aberration à côté de la vue des rayons, caustique et meilleur foyer sur la vue des rayons
+    position_rayons = fig[1].get_position()
+    axe_longi = fig[0].add_axes([0.71, 0.55, 0.27, 0.3], visible = False)
+    axe_trans = fig[0].add_axes([0.71, 0.1, 0.27, 0.3], visible = False)
+    ligne_lsa, = axe_longi.plot([], [], color = "C0")
+    ligne_tsa, = axe_trans.plot([], [], color = "C3")
+    axe_longi.set_ylabel("Aberration longitudinale")
+    axe_trans.set_ylabel("Aberration transverse")
+    axe_trans.set_xlabel("Hauteur d'impact sur le miroir")
+    for axe in [axe_longi, axe_trans]:
+        axe.grid(True)
+    points_caustique, = fig[1].plot([], [], ".", color = "C2", markersize = 1, animated = True)
+    marque_foyer, = fig[1].plot([], [], "x", color = "C3", animated = True)
+    artistes += [points_caustique, marque_foyer]
+
+    N_APERCU = 20   #Nombre maximal de rayons tracés pendant le déplacement d'un slider
+    N_ANALYSE = 100000  #Nombre de rayons du faisceau utilisé pour l'analyse
+    N_AFFICHE = 2000    #Nombre maximal de points des courbes d'analyse affichées
+
+    PAS_QUANTIFICATION = 1e-3   #Les paramètres sont arrondis à ce pas : une position déjà visitée retrouve son résultat en cache
+    CACHE_ENTREES = 128     #Nombre maximal de tracés conservés en cache
+    CACHE_OCTETS = 256e6    #Mémoire maximale occupée par les tracés en cache
+    PAS_ANTICIPATION = 0.02 #Écart (en fraction de la course des sliders) des positions voisines calculées d'avance, 0 pour ne rien anticiper
+
+    def calcul(ouverture, diametre, rayon, inf, N, analyse = False):
+        #Exécuté dans le thread de calcul : création du miroir et de la source, puis tracé sans affichage
+        objet_miroir = miroir(None, position = 7, r=rayon, dia = diametre)
+        objet_source = source(None, -10, 0,ouverture, N, inf = inf, height = 8)
+
+        #Analyse d'un faisceau dense, limité aux rayons incidents et à leur première réflexion
+        mesures = None
+        if analyse:
+            reflechis = tracer(source(None, -10, 0, ouverture, N_ANALYSE, inf = inf, height = 8).rayons(), [], [objet_miroir], rebonds_max = 1)
+            mesures = aberration_spherique(reflechis)
+            mesures["caustique"] = caustique(reflechis)
+            mesures["foyer"] = meilleur_foyer(reflechis)
+
+        return objet_miroir, objet_source, tracer(objet_source.rayons(), [], [objet_miroir]), mesures
+
+    def afficher(resultat):
+        #Exécuté dans l'interface : on remplace le miroir et la source, puis on met à jour les données des artistes existants
+        objet_miroir, objet_source, segments, mesures = resultat
+        lst_miroir[:] = [objet_miroir]
+        lst_source[:] = [objet_source]
+
+        ligne_miroir.set_data(*objet_miroir.contour(points_contour(fig[1], objet_miroir)))
+        actualiser(collections_rayons, segments)
+
+        if mesures is None:
+            rafraichir()
+            return
+
+        #Les courbes sont décimées pour l'affichage, les mesures utilisent tous les rayons
+        pas = max(1, mesures["h"].size//N_AFFICHE)
+        ligne_lsa.set_data(mesures["h"][::pas], mesures["lsa"][::pas])
+        ligne_tsa.set_data(mesures["h"][::pas], mesures["tsa"][::pas])
+        x_caustique, y_caustique = mesures["caustique"]
+        pas = max(1, x_caustique.size//N_AFFICHE)
+        points_caustique.set_data(x_caustique[::pas], y_caustique[::pas])
+
+        x_foyer, rms = mesures["foyer"]
+        marque_foyer.set_data([x_foyer], [0])
+        axe_longi.set_title("Foyer paraxial : x = {:.3f}".format(mesures["x_paraxial"]))
+        axe_trans.set_title("Meilleur foyer : x = {:.3f}, RMS = {:.3g}".format(x_foyer, rms))
+        for axe in [axe_longi, axe_trans]:
+            axe.relim()
+            axe.autoscale_view()
+
+        fig[0].canvas.draw_idle()   #Les graduations des axes d'analyse changent : tracé complet
+
+    def taille_resultat(resultat):
+        #Mémoire occupée par les tableaux d'un résultat de calcul (tableaux complets, même pour des vues)
+        objet_miroir, objet_source, segments, mesures = resultat
+        tableaux = [getattr(segments, champ) for champ in ["x0", "y0", "x1", "y1", "teta", "generation", "surface", "parent"]]
+        if mesures is not None:
+            tableaux += [valeur for valeur in mesures.values() if isinstance(valeur, np.ndarray)] + list(mesures["caustique"])
+        return sum((tableau.base if isinstance(tableau.base, np.ndarray) else tableau).nbytes for tableau in tableaux)
+
+    traceur = traceur_asynchrone(calcul, cache_lru(CACHE_ENTREES, CACHE_OCTETS, taille_resultat))
+
+    def verifier_resultat():
+        #Appelé régulièrement par un timer de l'interface : affiche le dernier tracé terminé
+        resultat = traceur.recuperer()
+        if resultat is not None:
+            afficher(resultat)
+
+    timer = fig[0].canvas.new_timer(interval = 15)
+    timer.add_callback(verifier_resultat)
+    timer.start()
+
+    def rafraichir():
+        #Redessine uniquement les artistes animés sur le fond mémorisé
+        canvas = fig[0].canvas
+        if fond is None or not canvas.supports_blit:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(fond)
+        for artiste in artistes:
+            fig[0].draw_artist(artiste)
+        canvas.blit(fig[0].bbox)
+
+    def sauver_fond(event):
+        #Appelé après chaque tracé complet (ouverture, redimensionnement, boutons) : on mémorise le fond puis on redessine les artistes animés
+        global fond
+        fond = fig[0].canvas.copy_from_bbox(fig[0].bbox)
+        rafraichir()
+
+    fig[0].canvas.mpl_connect("draw_event", sauver_fond)
     
     #Création des axes des wigets
     axe_teta = plt.axes([0.1, 0.92, 0.2, 0.03])
@@ -162,23 +371,38 @@ if __name__ == "__main__":
     axe_infiny = plt.axes([0.025, 0.7, 0.1, 0.1])
     axe_r = plt.axes([0.025, 0.5, 0.1, 0.1])
     axe_Nray = plt.axes([0.1, 0.89, 0.2, 0.03])
+    axe_analyse = plt.axes([0.025, 0.3, 0.1, 0.1])
 
     #Creation des sliders et des boutons
     slider_teta = wdg.Slider(axe_teta, 'Ouverture', 0, np.pi/4, valinit=np.pi/6)
     slider_diametre = wdg.Slider(axe_dia, 'Diamètre', 0, np.pi/2, valinit=np.pi/6)
     slider_rayon = wdg.Slider(axe_rayon, "Rayon", 0.1, 15, valinit=10)
-    slider_Nray = wdg.Slider(axe_Nray, "N",1,20, valinit=8, valstep=1)
+    slider_Nray = wdg.Slider(axe_Nray, "N",1,500, valinit=8, valstep=1)
     button_inf = wdg.RadioButtons(axe_infiny, ('Infinie', 'Non'))
     button_type = wdg.RadioButtons(axe_r, ("Concave", "Convexe"))
+    button_analyse = wdg.CheckButtons(axe_analyse, ["Analyse"], [False])
 
+    #Les sliders ne redessinent plus toute la figure : leurs parties mobiles sont animées et redessinées avec les rayons
+    for slider in [slider_teta, slider_diametre, slider_rayon, slider_Nray]:
+        slider.drawon = False
+        for artiste in [slider.poly, slider.valtext, getattr(slider, "_handle", None)]:
+            if artiste is not None:
+                artiste.set_animated(True)
+                artistes.append(artiste)
 
 
-    def mise_a_jour(val=None):
-        #On récupère la valeur des widgets
-        ouverture = slider_teta.val
-        diametre = slider_diametre.val
-        rayon = slider_rayon.val
-        N = slider_Nray.val
+
+    glissement = False  #Vrai pendant le déplacement d'un slider
+
+    def quantifier(valeur):
+        return round(valeur/PAS_QUANTIFICATION)*PAS_QUANTIFICATION
+
+    def parametres():
+        #On récupère la valeur des widgets, arrondie pour servir de clé au cache
+        ouverture = quantifier(slider_teta.val)
+        diametre = quantifier(slider_diametre.val)
+        rayon = quantifier(slider_rayon.val)
+        N = int(slider_Nray.val)
 
         #Si infini est choisi, la variable "infiny" devient True, et inversement
         if button_inf.value_selected == "Infinie":
@@ -190,19 +414,70 @@ if __name__ == "__main__":
         if button_type.value_selected == "Convexe":
             rayon *= -1
 
-        trace(ouverture = ouverture, diametre = diametre, rayon = rayon, inf = infiny, N = N)
+        analyse = button_analyse.get_status()[0]
+
+        return ouverture, diametre, rayon, infiny, N, analyse
+
+    def voisins(ouverture, diametre, rayon, infiny, N, analyse):
+        #Paramètres voisins de l'état actuel : boutons basculés et chaque slider décalé d'un pas dans les deux sens
+        lst_voisin = [(ouverture, diametre, -rayon, infiny, N, analyse), (ouverture, diametre, rayon, not infiny, N, analyse)]
+        if not PAS_ANTICIPATION:
+            return []
+        for indice, slider in [(0, slider_teta), (1, slider_diametre), (2, slider_rayon)]:
+            pas = (slider.valmax - slider.valmin)*PAS_ANTICIPATION
+            for signe in [-1, 1]:
+                voisin = [ouverture, diametre, rayon, infiny, N, analyse]
+                valeur = np.clip(abs(voisin[indice]) + signe*pas, slider.valmin, slider.valmax)
+                voisin[indice] = quantifier(np.copysign(valeur, voisin[indice]))
+                lst_voisin.append(tuple(voisin))
+        return lst_voisin
+
+    def mise_a_jour(val=None):
+        #Tracé complet, demandé au thread de calcul (ou trouvé dans le cache), puis calcul d'avance des états voisins
+        traceur.demander(*parametres())
+        traceur.anticiper(voisins(*parametres()))
+
+    def apercu(val=None):
+        #Pendant le déplacement d'un slider on demande un tracé rapide avec peu de rayons,
+        #sans analyse : les courbes sont recalculées au relâchement (voir mise_a_jour)
+        global glissement
+        glissement = True
+        ouverture, diametre, rayon, infiny, N, analyse = parametres()
+        traceur.demander(ouverture, diametre, rayon, infiny, min(N, N_APERCU), False)
+        rafraichir()    #Le slider est redessiné immédiatement, les rayons suivront
+
+    def basculer_analyse(label):
+        #Affiche ou cache les courbes d'analyse, la vue des rayons est réduite pour leur laisser la place
+        actif = button_analyse.get_status()[0]
+        axe_longi.set_visible(actif)
+        axe_trans.set_visible(actif)
+        fig[1].set_position([0.16, 0.1, 0.46, 0.75] if actif else position_rayons)
+        if not actif:
+            points_caustique.set_data([], [])
+            marque_foyer.set_data([], [])
+        mise_a_jour()
+        fig[0].canvas.draw_idle()
+
+    def relachement(event):
+        #Au relâchement de la souris, le tracé complet remplace l'aperçu
+        global glissement
+        if glissement:
+            glissement = False
+            mise_a_jour()
         
 
     #Définition de la fonction à appeler lorsque le widget a été modifié
-    slider_teta.on_changed(mise_a_jour)
-    slider_diametre.on_changed(mise_a_jour)
-    slider_rayon.on_changed(mise_a_jour)
-    slider_Nray.on_changed(mise_a_jour)
+    slider_teta.on_changed(apercu)
+    slider_diametre.on_changed(apercu)
+    slider_rayon.on_changed(apercu)
+    slider_Nray.on_changed(apercu)
+    fig[0].canvas.mpl_connect("button_release_event", relachement)
 
     button_inf.on_clicked(mise_a_jour)
     button_type.on_clicked(mise_a_jour)
+    button_analyse.on_clicked(basculer_analyse)
 
 
 
-    mise_a_jour()   #On appelle une premiere fois la fonction mise_a_jour() pour réaliser le premier plot
+    afficher(calcul(*parametres()))   #Le premier tracé est réalisé directement
     plt.show()
@@ -1,12 +1,25 @@
-import matplotlib.pyplot as plt
 import numpy as np
-import matplotlib.widgets as wdg
+
+from moteur import faisceau, tracer
+from materiaux import LONGUEUR_ONDE, materiau
+from rendu import dessiner, dessiner_surface, dessiner_densite, dessiner_spectre, densite    #rendu ne charge matplotlib qu'au premier tracé
+
+#Objets du script, utilisés par les objets créés avec une figure (les objets sans figure se tracent avec moteur.scene)
+lst_ray = []
+lst_miroir = []
+lst_source = []
+lst_dioptre = []    #Cette liste n'est pas a remplir par l'utilisateur, c'est le programme qui la rempli automatiquement
+lst_detecteur = []
+
+TAILLE_MORCEAU = 100000     #Nombre de rayons tracés à la fois par une source affichée en densité
 
 class rayon:
     """ 
     Tracé d'un rayon lumineux et détermination des points de contact
 
     ----------
+    figure : tuple (fig, ax)
+        Figure sur laquelle tracer le rayon (None pour un rayon sans affichage, à tracer avec moteur.scene).
     x : float
         Abscisse du point d'origine du rayon.
     y : float
@@ -17,142 +30,46 @@ class rayon:
         Couleur du rayon.
     direction : bool
         Direction de propagation du rayon (True = vers la droite)
-    origine : object
-        Origine du rayon (None si provient d'une source)
+    origine : int
+        Indice de la surface dont provient le rayon (None si provient d'une source)
+    longueur_onde : float
+        Longueur d'onde du rayon (µm), utile avec des lentilles dispersives (voir materiaux.py)
     """
-    def __init__(self,figure, x =0, y=0, teta=0, color = "k", direction = True, origine = None):
+    #Pas de __dict__ ni de référence à la figure : les segments tracés sont stockés dans les tableaux de resultat
+    __slots__ = ("x", "y", "teta", "color", "direction", "origine", "longueur_onde", "resultat")
+
+    def __init__(self,figure, x =0, y=0, teta=0, color = "k", direction = True, origine = None, longueur_onde = LONGUEUR_ONDE):
         self.x = x  #abscisse d'origine
         self.y =y   #ordonnée d'origine
         self.teta = teta    #angle du rayon par rapport à l'axe des abscisses
         self.color = color  #Couleur du rayon
         self.direction = direction  #Direction du rayon
-        self.origine = origine      #Permet de savoir l'origine du rayon (de quel miroir il provient), utile pour le débogage
-        
-        self.fig, self.ax = figure  #Figure sur laquelle tracer
-        
-        
-        
-        if self.direction: #Défini le vecteur x conrrespondant a la direction du rayon
-            self.x_array = np.linspace(self.x,self.x+20)
-        else:
-            self.x_array = np.linspace(self.x, self.x-20)
-        
-        if origine != None:
+        self.origine = -1 if origine is None else int(origine)    #Indice de la surface d'origine (-1 = source), utile pour le débogage
+        self.longueur_onde = longueur_onde
+        self.resultat = None    #Segments parcourus, calculés par check()
+
+        if origine is not None:
             self.color="C1"
         
         
-        #On appelle la méthode check() permettant de déterminer si le rayon entre en contact avec un miroir
-        self.check()
+        #On appelle la méthode check() permettant de déterminer les contacts du rayon et des rayons qui en sont issus
+        if figure is not None:
+            self.check(figure[1])
         
-    def trace(self):
-        #méthode traçant le rayon
-        y = (self.x_array-self.x)*np.tan(self.teta) +self.y #vecteur y
-        
-        self.ax.plot(self.x_array, y,self.color, alpha = 0.2) #plot
+    def trace(self, ax):
+        #méthode traçant le rayon et les rayons réfléchis/réfractés
+        dessiner(ax, self.resultat, self.color, alpha = 0.2)
+
+    def rayons(self):
+        #Faisceau d'un seul rayon, utilisé par check() et par moteur.scene
+        return faisceau(self.x, self.y, self.teta, self.direction, longueur_onde = self.longueur_onde)
         
-    def check(self):
+    def check(self, ax):
         #Méthode vérifiant si le rayon entre en contact avec un obstacle (dioptre ou miroir)
-        def fonction(liste):
-            #Fonction prenant en entrée la liste des dioptre de la figure vérifiant si le rayon entre en contact avec un dioptre.
-            #Si le rayon va vers la gauche, la liste indiquée sera la liste contenant les dioptre parcourue dans le sens inverse.
-            
-            for dioptre in liste:   #Pour tous les dioptres
-                
-                #Résolution de l'équation
-                A = 1+(np.tan(self.teta)**2)
-                B = -2*dioptre.c -2*self.x*(np.tan(self.teta)**2)+2*self.y*np.tan(self.teta)
-                C = (dioptre.c)**2 + (self.x**2)*(np.tan(self.teta)**2) - 2*self.y*self.x*np.tan(self.teta) + (self.y**2) - (dioptre.r**2)
-
-                delta = (B**2)-(4*A*C)
-                if delta < 0:
-                    continue
-
-                #On choisi la bonne solution en fonction de l'interface rencontrée
-                if dioptre.side:
-                    X1 = (-B-np.sqrt(delta))/(2*A)
-                else:
-                    X1 = (-B+np.sqrt(delta))/(2*A)
-                Y1 = (X1-self.x)*np.tan(self.teta) +self.y
-
-                #Sécurité pour éviter de créer un deuxième rayon réfléchi au point de départ d'un rayon réfléchi
-                if round(X1,1) == round(self.x,1):
-                    continue
-
-                #On vérifie si le programme n'as pas choisi la mauvaise solution, et que la solution est bien sur l'interface
-                if (Y1 > dioptre.min and Y1 < dioptre.max) and (X1 > np.min(dioptre.xc) and X1 < np.max(dioptre.xc)) and X1 < np.max(self.x_array)  and X1 > np.min(self.x_array):                
-                    self.x_array = np.linspace(self.x, X1, 100)
-                
-                    #On calcul l'angle de la normale en fonction de l'interface rencontrée
-                    if dioptre.side:
-                        teta_rayon = np.pi - np.arctan(Y1/(dioptre.c-X1))
-                    else:
-                        teta_rayon = np.arctan(Y1/(X1 - dioptre.c))
-                    
-                    #Calcul de l'angle entre la normale et le rayon incident
-                    beta = (np.pi - teta_rayon + self.teta)
-                    
-                    #Calcul de l'angle entre la normale et le rayon réfracté
-                    alpha = np.arcsin((np.sin(beta)*dioptre.n_left)/dioptre.n_right)
-                
-
-
-
-                    if (self.direction and dioptre.side) or (not self.direction and not dioptre.side):
-                        teta_nouveau = teta_rayon + alpha - np.pi
-                    else:
-                        teta_nouveau = -alpha + teta_rayon
-
-
-   
-                    #Création d'un rayon réfracté en fonction du point d'impact et de l'angle calculé précédemment
-                    lst_ray.append(rayon((self.fig,self.ax),X1,Y1, teta_nouveau, origine = dioptre, direction = self.direction))
-        
-        #Si le rayon se dirige vers la droite, la liste est parcourue dans son sens normal, sinon dans son sens inverse
-        if self.direction:
-            fonction(lst_dioptre)
-        else:
-            fonction(lst_dioptre[::-1])
-
-        for miroir in lst_miroir: #Pour chaque miroir existant
-            #Résolution de l'équation
-            A = 1+(np.tan(self.teta)**2)
-            B = -2*(miroir.x-miroir.r) -2*self.x*(np.tan(self.teta)**2)+2*self.y*np.tan(self.teta)
-            C = (miroir.x-miroir.r)**2 + (self.x**2)*(np.tan(self.teta)**2) - 2*self.y*self.x*np.tan(self.teta) + (self.y**2) - (miroir.r**2)
-
-            delta = (B**2)-(4*A*C)
-
-            #Si delta négatif, pas de solution, on passe le tour de boucle
-            if delta <0:
-                continue
-            #Si r>0, la solution est sur la droite du "cercle", sinon elle est sur la gauche du "cercle"
-            if miroir.r>0:
-                X1 = (-B+np.sqrt(delta))/(2*A)
-            else:
-                X1 = (-B-np.sqrt(delta))/(2*A)
-            Y1 = (X1-self.x)*np.tan(self.teta) +self.y  #Calcul de l'ordonnée du point de contact
-
-            if round(X1) == round(self.x): #Sécurité pour éviter de créer un deuxième rayon réfléchi au point de départ d'un rayon réfléchi
-                continue
-            
-            #On vérifie si le programme n'as pas choisi la mauvaise solution, et que la solution est bien sur le miroir
-            if Y1 < miroir.max and Y1 > miroir.min and (((self.direction == False) and (self.x > miroir.x)) or ((self.direction == True) and (self.x < miroir.x)))  and round(X1,1) >= round(np.min(miroir.xc),1) and round(X1,1) <= round(np.max(miroir.xc),1) and ((X1 <= max(self.x_array) and self.direction) or (X1 >= min(self.x_array) and self.direction == False)):
-                self.x_array = np.linspace(self.x,X1,100)  #On créé le vecteur x entre le point de départ et d'arrivée
-                teta_rayon = np.arcsin(Y1/miroir.r)        #On calcule l'angle de la normale
-                teta_nouveau = -np.pi + 2*teta_rayon -self.teta    #On calcule l'angle du rayon réfléchi
-
-     
-                teta_nouveau = (teta_nouveau + np.pi) % (2 * np.pi) - np.pi #transforme la valeur de l'angle entre -pi/2,pi/2
-                if abs(teta_nouveau) > np.pi/2 : #On définit la direction du rayon en fonction de son angle   and abs(teta_nouveau) < 3*np.pi/2
-                    direction = False
-                else:
-                    direction = True
-                #On créé un nouveau rayon (réfléchi) en fonction du point de contact avec le miroir, l'angle et sa direction
-                lst_ray.append(rayon((self.fig,self.ax),X1,Y1, teta_nouveau, origine = miroir, direction = direction))
-
-
-                
-       
-        self.trace()    #On trace le rayon incident
+        #Le rayon est traité comme un faisceau d'un seul rayon, propagé génération par génération sans récursion
+        self.resultat = tracer(self.rayons(), lst_dioptre, lst_miroir, lst_detecteur = lst_detecteur)
+
+        self.trace(ax)    #On trace le rayon incident et ses descendants
 
 class source:
     """ 
@@ -160,6 +77,8 @@ class source:
     Permet de créer une source à l'infinie ou non.
 
     ----------
+    figure : tuple (fig, ax)
+        Figure sur laquelle tracer les rayons (None pour une source sans affichage, à tracer avec moteur.scene).
     x : float
         Abscisse du point d'origine des rayons.
     y : float
@@ -172,8 +91,14 @@ class source:
         Source à l'infinie ou non.
     height : str
         Hauteur de répartition des rayons lorsque la source est considérée à l'infinie.
+    image : bool
+        Affichage de la densité des rayons dans une image (voir rendu.densite) plutôt que d'un segment par rayon,
+        lisible et rapide pour un grand nombre de rayons.
+    longueurs_onde : list
+        Longueurs d'onde émises (µm) : chaque rayon est émis une fois par longueur d'onde, toutes les couleurs
+        étant tracées dans le même faisceau (par défaut une seule, materiaux.LONGUEUR_ONDE).
     """
-    def __init__(self,figure, x, y, angle, N, inf = False, height = 0):
+    def __init__(self,figure, x, y, angle, N, inf = False, height = 0, image = False, longueurs_onde = None):
         self.figure = figure    #Figure sur laquelle tracer
         self.x = x              #Position x,y de la source
         self.y = y
@@ -181,18 +106,54 @@ class source:
         self.N = N              #Nombre de rayon créés par la source
         self.infiny = inf       #Source à l'infinie
         self.height = height    #Hauteur de création des rayons en mode infini
-
-        self.create_ray()
+        self.image = image      #Affichage en densité
+        self.longueurs_onde = None if longueurs_onde is None else np.atleast_1d(np.asarray(longueurs_onde, dtype = float))
+
+        if self.figure is not None:
+            self.create_ray()
+
+    def rayons(self, debut = 0, fin = None):
+        #Rayons d'indices debut à fin (tous par défaut) regroupés dans un faisceau traité en une seule passe par surface
+        #Chaque rayon est calculé à partir de son indice, comme avec np.linspace, sans créer les N rayons
+        fin = self.N if fin is None else min(fin, self.N)
+        indices = np.arange(debut, fin)
+        pas = 1/(self.N - 1) if self.N > 1 else 0
+        return self.rayons_position(np.where((indices == self.N - 1) & (self.N > 1), 1, indices*pas)*2 - 1)
+
+    def rayons_position(self, repartition):
+        #Rayons placés en des positions quelconques entre -1 et 1 (bords de l'ouverture ou de la hauteur), voir moteur.scene.tracer_adaptatif
+        #Avec plusieurs longueurs d'onde, chaque position donne un rayon par longueur d'onde (rayons consécutifs)
+        longueur_onde = LONGUEUR_ONDE
+        if self.longueurs_onde is not None:
+            longueur_onde = np.tile(self.longueurs_onde, np.size(repartition))
+            repartition = np.repeat(repartition, self.longueurs_onde.size)
+
+        if self.infiny: #Si la source est à l'infini, les rayons d'angle 0rad sont répartis sur la hauteur
+            return faisceau(self.x, repartition*self.height/2, 0, longueur_onde = longueur_onde)
+        else:   #Sinon les rayons partent du même point avec des angles répartis sur l'ouverture
+            return faisceau(self.x, self.y, repartition*self.alpha, longueur_onde = longueur_onde)
+
+    def morceaux(self, taille):
+        #Générateur des rayons de la source par morceaux de taille rayons (voir moteur.scene.tracer_flux)
+        for debut in range(0, self.N, taille):
+            yield self.rayons(debut, debut + taille)
 
     def create_ray(self):
-        lst_angle = np.linspace(-self.alpha, self.alpha, self.N)    #Liste des angles pour chaque rayon de la source
+        #On propage le faisceau génération par génération puis on trace tous les segments
+        ax = self.figure[1]
+        if not self.image:
+            resultat = tracer(self.rayons(), lst_dioptre, lst_miroir, lst_detecteur = lst_detecteur)
+            if self.longueurs_onde is not None and self.longueurs_onde.size > 1:
+                dessiner_spectre(ax, resultat, alpha = 0.2)    #Une couleur par longueur d'onde
+            else:
+                dessiner(ax, resultat, alpha = 0.2)
+            return
 
-        if self.infiny: #Si la source est à l'infini
-            for y in np.linspace(-self.height/2, self.height/2, self.N):
-                lst_ray.append(rayon(self.figure, self.x, y, 0))    #Création d'un rayon d'angle 0rad
-        else:
-            for angle in lst_angle:
-                lst_ray.append(rayon(self.figure, self.x, self.y, angle)) #Sinon on trace un rayon avec l'angle correspondant
+        #Densité accumulée morceau par morceau dans les limites actuelles des axes : les segments ne sont pas conservés
+        accumulation = densite(ax.get_xlim(), ax.get_ylim())
+        for rayons in self.morceaux(TAILLE_MORCEAU):
+            accumulation.ajouter(tracer(rayons, lst_dioptre, lst_miroir, lst_detecteur = lst_detecteur))
+        dessiner_densite(ax, accumulation)
 
 
     
@@ -201,8 +162,8 @@ class miroir:
     Créé un miroir sphérique concave ou convexe
 
     ----------
-    fig : matplotlib figure
-        Figure sur laquelle tracer le miroir.
+    fig : tuple (fig, ax)
+        Figure sur laquelle tracer le miroir (None pour un miroir sans affichage).
     x : float
         Abscisse du point d'origine des rayons.
     r : float
@@ -217,26 +178,33 @@ class miroir:
         self.diametre = diametre     #demi-diamètre d'ouverture
         self.r = r              #Rayon du miroir
         self.color = color      #Couleur du miroir
-        self.fig, self.ax = fig  #Figure sur laquelle tracer le miroir
-
-        self.max = int  #Initialisation des variables max et min
-        self.min = int
+        self.fig, self.ax = fig if fig is not None else (None, None)  #Figure sur laquelle tracer le miroir
 
         self.test = False
 
-        self.trace()    #On trace le miroir
+        #Calcul des bornes du miroir une seule fois, sans échantillonner le cercle (utile pour la condition d'intersection des rayons)
+        self.max = abs(self.r)*np.sin(min(self.diametre, np.pi/2))     #Hauteur max et min du miroir
+        self.min = -self.max
+        fleche = abs(self.r)*(1 - np.cos(min(self.diametre, np.pi)))   #Profondeur du miroir selon l'axe des abscisses
+        if self.r > 0:
+            self.xmin, self.xmax = self.x - fleche, self.x
+        else:
+            self.xmin, self.xmax = self.x, self.x + fleche
 
-    def trace(self):
-        teta = np.linspace(-self.diametre, self.diametre,1000)   #Vecteur teta correspondant à l'angle de chaque point du cercle par rapport à l'axe des x
-        
-        self.xc = self.r*np.cos(teta) - self.r + self.x #array des x
-        self.yc = self.r*np.sin(teta)   #array des y
+        if self.ax is not None:
+            self.trace()    #On trace le miroir
 
-        #Calcul de la hauteur max et min du miroir
-        self.max = np.max(self.yc)
-        self.min = -self.max
-        
-        self.ax.plot(self.xc, self.yc, color = self.color) #tracé du miroir
+    def longueur(self):
+        #Longueur de l'arc du miroir
+        return 2*abs(self.r)*self.diametre
+
+    def contour(self, N = 1000):
+        #Points du miroir pour l'affichage, calculés seulement lorsque le miroir est tracé
+        teta = np.linspace(-self.diametre, self.diametre, N)   #Vecteur teta correspondant à l'angle de chaque point du cercle par rapport à l'axe des x
+        return self.r*np.cos(teta) - self.r + self.x, self.r*np.sin(teta)
+
+    def trace(self):
+        dessiner_surface(self.ax, self, color = self.color) #tracé du miroir, plus ou moins détaillé selon le zoom
         #self.ax.plot(self.x - self.r, 0,marker = "o", color = self.color) #Tracé du centre du miroir
 
 
@@ -246,60 +214,75 @@ class sous_dioptre:
     Voir class dioptre.
 
     ----------
-    fig : matplotlib figure
-        Figure sur laquelle tracer le dioptre.
+    fig : tuple (fig, ax)
+        Figure sur laquelle tracer le dioptre (None pour une interface sans affichage).
     centre : float
         centre du cercle
     r : float
         Rayon du cercle.
-    n_left : float
-        indice de réfraction à gauche de l'interface
-    n_right : float
+    diametre : float
+        demi-angle d'ouverture de l'interface
+    n_left : float ou matériau
+        indice de réfraction à gauche de l'interface (voir materiaux.py pour un indice fonction de la longueur d'onde)
+    n_right : float ou matériau
         indice de réfraction à droite de l'interface
     side : bool
         côté concave de la lentille
     color : str
         Couleur du miroir
     """
-    def __init__(self, fig, centre, r, teta, n_left, n_right, side, color = "red"):
-        self.fig, self.ax = fig
+    def __init__(self, fig, centre, r, diametre, n_left, n_right, side, color = "red"):
+        self.fig, self.ax = fig if fig is not None else (None, None)
         self.color = color #Couleur du dioptre
 
         self.side = side #permet de savoir quel côté du cercle est tracé de manière à choisir la bonne solution de l'équation (true = gauche)
 
         self.r = r #rayon du cercle
         self.c = centre #centre du cercle
-        self.teta = teta #array contenant les angles nécessaires au tracé des dioptres
+        self.diametre = diametre #demi-angle d'ouverture de l'interface
         self.n_left = n_left #indice de réfraction à gauche de la surface
         self.n_right = n_right #indice de réfraction à droite de la surface
 
-        self.trace() #Appel de la méthode trace pour tracer la surface
+        #Calcul des bornes du dioptre une seule fois (utile pour la condition dans la méthode check des rayons)
+        self.max = self.r*np.sin(min(self.diametre, np.pi/2))
+        self.min = -self.max
+        if self.side:   #Partie gauche du cercle
+            self.xmin, self.xmax = self.c - self.r, self.c - self.r*np.cos(self.diametre)
+        else:           #Partie droite du cercle
+            self.xmin, self.xmax = self.c + self.r*np.cos(self.diametre), self.c + self.r
+
+        if self.ax is not None:
+            self.trace() #Appel de la méthode trace pour tracer la surface
 
-    def trace(self):
-        self.xc = self.r*np.cos(self.teta)+self.c #array des x
-        self.yc = self.r*np.sin(self.teta)   #array des y
+    def longueur(self):
+        #Longueur de l'arc de l'interface
+        return 2*self.r*self.diametre
 
-        self.ax.plot(self.xc, self.yc, color = self.color) #tracé
+    def contour(self, N = 1000):
+        #Points de l'interface pour l'affichage, calculés seulement lorsque l'interface est tracée
+        teta = np.linspace(-self.diametre, self.diametre, N)
+        if self.side:
+            teta = teta + np.pi
+        return self.r*np.cos(teta)+self.c, self.r*np.sin(teta)
 
-        #Calcul de la hauteur max et min du dioptre (utile pour la condition dans la méthode check des rayons)
-        self.max = np.max(self.yc)
-        self.min = -self.max
+    def trace(self):
+        dessiner_surface(self.ax, self, color = self.color) #tracé, plus ou moins détaillé selon le zoom
 
 class dioptre:
     """ 
     Créé deux interfaces sous_dioptre par rapports aux paramètres de la lentille.
 
     ----------
-    fig : matplotlib figure
-        Figure sur laquelle tracer le dioptre.
+    fig : tuple (fig, ax)
+        Figure sur laquelle tracer le dioptre (None pour une lentille sans affichage, à tracer avec moteur.scene).
     x : float
         centre de la lentille
     r : float
         Rayon du cercle.
     s : float
         distance entre le centre de la lentille et les sommets des cercles
-    n : float
-        indice de réfraction de la lentille
+    n : float, str ou matériau
+        indice de réfraction de la lentille, ou matériau dispersif (voir materiaux.py, par exemple "BK7")
     type : str
         type de la lentille (convergent ou divergent)
     color : str
@@ -311,7 +294,7 @@ class dioptre:
         self.x = x  #Centre de la lentille
         self.r = r  #Rayon des dioptres
         self.s = s  #Distance entre le centre de la lentille et les sommets des dioptres
-        self. n = n #Indice de réfraction de la lentille
+        self. n = materiau(n) #Indice de réfraction de la lentille (nombre, matériau ou nom d'un verre de materiaux.CATALOGUE)
         self.color = color  #Couleur de la lentille
         self.type = type    #Type de lentille
         
@@ -321,9 +304,13 @@ class dioptre:
 
         #Appel de la méthode correspondant au type de lentille pour tracer les interfaces de la bonne manière
         if self.type == "convergent":
-            self.convergent()
+            self.interfaces = self.convergent()
         else:
-            self.divergent()
+            self.interfaces = self.divergent()
+
+        #Une lentille tracée sur une figure participe directement au tracé des rayons du script
+        if self.fig is not None:
+            lst_dioptre.extend(self.interfaces)
 
     def convergent(self):
         diametre = np.arccos((self.r-self.s)/self.r)
@@ -332,12 +319,9 @@ class dioptre:
         c2 = self.x + self.s - self.r #Centre du deuxieme cercle
 
 
-        teta1 = np.linspace(-diametre, diametre, 100)   #Vecteurs contenant les angles nécessaires au tracé
-        teta2 = np.linspace(-diametre+np.pi, diametre+np.pi, 100)
-
         #Création des deux surfaces
-        lst_dioptre.append(sous_dioptre(fig, c1, self.r, teta2, 1, self.n, True, color = self.color))
-        lst_dioptre.append(sous_dioptre(fig, c2, self.r, teta1, self.n, 1, False, color = self.color))
+        return [sous_dioptre(self.fig, c1, self.r, diametre, 1, self.n, True, color = self.color),
+                sous_dioptre(self.fig, c2, self.r, diametre, self.n, 1, False, color = self.color)]
 
     def divergent(self):
         diametre = np.arccos((self.r-self.s)/self.r)    #angle d'ouverture maximale
@@ -345,12 +329,64 @@ class dioptre:
         c1 = self.x + self.s + self.r   #Centre du premier cercle
         c2 = self.x - self.s - self.r   #Centre du deuxieme cercle
 
-        teta1 = np.linspace(-diametre, diametre, 1000)  #Vecteurs contenant les angles nécessaires au tracé
-        teta2 = np.linspace(-diametre+np.pi, diametre+np.pi, 1000)
-
         #Création des deux surfaces
-        lst_dioptre.append(sous_dioptre(fig, c2, self.r, teta1, 1,self.n, False, color = self.color))
-        lst_dioptre.append(sous_dioptre(fig, c1, self.r, teta2,self.n, 1, True, color = self.color))
+        return [sous_dioptre(self.fig, c2, self.r, diametre, 1,self.n, False, color = self.color),
+                sous_dioptre(self.fig, c1, self.r, diametre,self.n, 1, True, color = self.color)]
+
+
+class detecteur:
+    """
+    Créé un détecteur (écran) plan : segment centré en (x, y), perpendiculaire à l'axe des abscisses lorsque angle = 0.
+    Les rayons qui le touchent s'y arrêtent (ou le traversent s'il est transparent), leurs impacts sont enregistrés
+    avec analyse.impacts_detecteur. La traversée d'un détecteur transparent ne compte ni comme génération ni comme
+    rebond (voir moteur.tracer) : ajouter un plan d'observation ne change pas le tracé.
+
+    ----------
+    fig : tuple (fig, ax)
+        Figure sur laquelle tracer le détecteur (None pour un détecteur sans affichage).
+    x, y : float
+        Centre du détecteur.
+    hauteur : float
+        Longueur du détecteur.
+    angle : float
+        Inclinaison du détecteur par rapport à la verticale.
+    transparent : bool
+        Les rayons traversent le détecteur sans être déviés (plan d'observation au milieu du système).
+    color : str
+        Couleur du détecteur.
+    """
+    def __init__(self, fig, x = 0, y = 0, hauteur = 10, angle = 0, transparent = False, color = "green"):
+        self.x = x      #Centre du détecteur
+        self.y = y
+        self.hauteur = hauteur
+        self.angle = angle
+        self.transparent = transparent
+        self.color = color
+        self.fig, self.ax = fig if fig is not None else (None, None)
+
+        #Direction du détecteur, extrémités A et B et boîte englobante
+        self.ux, self.uy = -np.sin(angle), np.cos(angle)
+        self.xa, self.ya = x - self.ux*hauteur/2, y - self.uy*hauteur/2
+        self.xb, self.yb = x + self.ux*hauteur/2, y + self.uy*hauteur/2
+        self.xmin, self.xmax = min(self.xa, self.xb), max(self.xa, self.xb)
+        self.min, self.max = min(self.ya, self.yb), max(self.ya, self.yb)
+
+        if self.ax is not None:
+            self.trace()
+
+    def coordonnee(self, x, y):
+        #Position le long du détecteur, comptée depuis son centre (ordonnée relative pour un détecteur vertical)
+        return (x - self.x)*self.ux + (y - self.y)*self.uy
+
+    def longueur(self):
+        return self.hauteur
+
+    def contour(self, N = 2):
+        #Un segment n'a besoin que de ses extrémités
+        return np.array([self.xa, self.xb]), np.array([self.ya, self.yb])
+
+    def trace(self):
+        dessiner_surface(self.ax, self, color = self.color)
         
         
 
@@ -361,6 +397,8 @@ class dioptre:
 
     
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt     #matplotlib n'est chargé que pour l'interface
+
     fig = plt.subplots()  #Création de la figure
 
     #Limites, grille, ratio des axes..
@@ -369,12 +407,6 @@ if __name__ == "__main__":
     fig[1].grid(True)
     fig[1].set_aspect("equal")
 
-    #Listes vides que l'on va remplir par les objets
-    lst_ray = []
-    lst_miroir = []
-    lst_source = []
-    lst_dioptre = []    #Cette liste n'est pas a remplir par l'utilisateur, c'est le programme qui la rempli automatiquement
-    
     #On créé les objets miroir et source que l'on ajoute dans la liste correspondant
     lst_miroir.append(miroir(x = 15, r=-15, diametre = np.pi/4, fig = fig, color = "blue")) 
     
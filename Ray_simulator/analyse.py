@@ -0,0 +1,322 @@
+import numpy as np
+
+
+def premiers_segments(resultat, generation = 1):
+    #Masque des segments d'une génération donnée, sans les suites d'un rayon qui a traversé un détecteur transparent
+    #(même génération, même angle et départ à la fin du segment parent). Les parents d'une partie d'un résultat
+    #ne désignent plus les bons segments, mais ces conditions ne sont alors pas remplies
+    parent = np.clip(resultat.parent, 0, max(len(resultat) - 1, 0))
+    suite = ((resultat.parent >= 0) & (resultat.parent < len(resultat)) & (resultat.generation[parent] == generation)
+             & (resultat.teta[parent] == resultat.teta) & (resultat.x1[parent] == resultat.x0) & (resultat.y1[parent] == resultat.y0))
+    return (resultat.generation == generation) & ~suite
+
+
+def rayons_reflechis(resultat, generation = 1):
+    #Segments d'une génération donnée (par défaut les rayons après la première réflexion/réfraction), un par rayon
+    return resultat[premiers_segments(resultat, generation)]
+
+
+def aberration_spherique(resultat, generation = 1):
+    """
+    Aberration sphérique longitudinale et transverse en fonction de la hauteur d'impact des rayons.
+
+    ----------
+    resultat : resultat_trace
+        Segments tracés (voir moteur.scene).
+    generation : int
+        Génération des rayons étudiés (1 = rayons réfléchis par le miroir).
+
+    Retourne un dictionnaire contenant la hauteur d'impact h, l'abscisse x_axe où chaque rayon coupe l'axe optique,
+    la position du foyer paraxial x_paraxial, l'aberration longitudinale lsa = x_axe - x_paraxial
+    et l'aberration transverse tsa (ordonnée des rayons dans le plan du foyer paraxial), triés selon h.
+    """
+    rayons = rayons_reflechis(resultat, generation)
+    pente = np.tan(rayons.teta)
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        x_axe = rayons.x0 - rayons.y0/pente
+    valide = np.isfinite(x_axe) & (rayons.y0 != 0)    #Les rayons sur l'axe ne le coupent pas
+
+    ordre = np.argsort(rayons.y0[valide])
+    h = rayons.y0[valide][ordre]
+    x_axe = x_axe[valide][ordre]
+    pente = pente[valide][ordre]
+    x0 = rayons.x0[valide][ordre]
+
+    #Foyer paraxial : limite de x_axe lorsque h tend vers 0 (ajustement de x_axe par un polynôme en h²)
+    if h.size >= 2:
+        x_paraxial = np.polyfit(h**2, x_axe, min(4, h.size - 1))[-1]
+    elif h.size:
+        x_paraxial = x_axe[0]
+    else:
+        x_paraxial = np.nan
+
+    return {"h": h, "x_axe": x_axe, "x_paraxial": x_paraxial,
+            "lsa": x_axe - x_paraxial,
+            "tsa": h + pente*(x_paraxial - x0)}
+
+
+def aberration_chromatique(resultat, generation = 1, reference = None):
+    """
+    Aberration chromatique des rayons tracés avec plusieurs longueurs d'onde (voir materiaux.py).
+
+    ----------
+    resultat : resultat_trace
+        Segments tracés.
+    generation : int
+        Génération des rayons étudiés (2 = rayons sortant d'une lentille simple).
+    reference : float
+        Longueur d'onde (µm) dont le foyer paraxial sert de plan d'observation (par défaut la médiane).
+
+    Retourne un dictionnaire contenant les longueurs d'onde tracées (croissantes), le foyer paraxial x_paraxial de
+    chacune, l'aberration longitudinale lca = foyer de la plus courte - foyer de la plus longue, et l'aberration
+    transverse tca : plus grand écart d'ordonnée, dans le plan du foyer de référence, entre les rayons de longueurs
+    d'onde différentes issus d'un même rayon de départ.
+    """
+    rayons = rayons_reflechis(resultat, generation)
+    longueurs_onde = np.unique(rayons.longueur_onde)
+    x_paraxial = np.array([aberration_spherique(rayons[rayons.longueur_onde == longueur_onde], generation)["x_paraxial"]
+                           for longueur_onde in longueurs_onde])
+    if longueurs_onde.size < 2:
+        return {"longueurs_onde": longueurs_onde, "x_paraxial": x_paraxial, "lca": 0., "tca": 0.}
+
+    if reference is None:
+        reference = longueurs_onde[(longueurs_onde.size - 1)//2]
+    x_reference = x_paraxial[np.argmin(np.abs(longueurs_onde - reference))]
+
+    #Rayon de départ (segment de génération 0) de chaque segment étudié
+    indices = np.flatnonzero(premiers_segments(resultat, generation))
+    origine = indices.copy()
+    parent = resultat.parent[origine]
+    while np.any(parent >= 0):
+        origine = np.where(parent >= 0, parent, origine)
+        parent = np.where(parent >= 0, resultat.parent[origine], -1)
+    depart = np.stack([resultat.x0[origine], resultat.y0[origine], resultat.teta[origine]], axis = 1)
+    groupe = np.unique(depart, axis = 0, return_inverse = True)[1].reshape(-1)
+
+    #Écart maximal des ordonnées dans le plan de référence au sein de chaque groupe
+    y = resultat.y0[indices] + np.tan(resultat.teta[indices])*(x_reference - resultat.x0[indices])
+    valide = np.isfinite(y)
+    y_max = np.full(groupe.max() + 1, -np.inf)
+    y_min = np.full(groupe.max() + 1, np.inf)
+    np.maximum.at(y_max, groupe[valide], y[valide])
+    np.minimum.at(y_min, groupe[valide], y[valide])
+    ecart = (y_max - y_min)[np.isfinite(y_max - y_min)]
+
+    return {"longueurs_onde": longueurs_onde, "x_paraxial": x_paraxial,
+            "lca": x_paraxial[0] - x_paraxial[-1],
+            "tca": ecart.max() if ecart.size else np.nan}
+
+
+def caustique(resultat, generation = 1):
+    """
+    Points de l'enveloppe (caustique) des rayons : intersection de chaque rayon avec son voisin,
+    les rayons étant triés selon leur hauteur d'impact.
+
+    Retourne les abscisses et ordonnées des points de la caustique.
+    """
+    rayons = rayons_reflechis(resultat, generation)
+    ordre = np.argsort(rayons.y0)
+    x0, y0 = rayons.x0[ordre], rayons.y0[ordre]
+    pente = np.tan(rayons.teta[ordre])
+
+    #Intersection des droites y = y0 + pente*(x - x0) de deux rayons voisins du même côté de l'axe
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        x = (y0[1:] - y0[:-1] + pente[:-1]*x0[:-1] - pente[1:]*x0[1:])/(pente[:-1] - pente[1:])
+    y = y0[:-1] + pente[:-1]*(x - x0[:-1])
+    valide = np.isfinite(x) & np.isfinite(y) & (np.sign(y0[1:]) == np.sign(y0[:-1]))
+    return x[valide], y[valide]
+
+
+def meilleur_foyer(resultat, generation = 1):
+    """
+    Plan de meilleure mise au point : abscisse où la tache (écart quadratique moyen des ordonnées des rayons) est minimale.
+    Les ordonnées des rayons dans le plan x s'écrivent a + b*x, la variance de la tache est donc un polynôme
+    du second degré en x dont le minimum est calculé directement, sans balayer de plans.
+
+    Retourne l'abscisse du meilleur foyer et le rayon RMS de la tache en ce point.
+    """
+    rayons = rayons_reflechis(resultat, generation)
+    if len(rayons) < 2:
+        return np.nan, np.nan
+    b = np.tan(rayons.teta)
+    a = rayons.y0 - b*rayons.x0
+
+    covariance = np.mean((a - a.mean())*(b - b.mean()))
+    variance_b = np.var(b)
+    if variance_b == 0:     #Rayons parallèles : la tache a la même taille partout
+        return np.nan, np.sqrt(np.var(a))
+
+    x = -covariance/variance_b
+    return x, np.sqrt(max(np.var(a) + 2*x*covariance + x**2*variance_b, 0))
+
+
+def _cumuler(total, valeurs):
+    #Somme de deux tableaux de comptage de longueurs éventuellement différentes
+    if valeurs.size > total.size:
+        total, valeurs = valeurs, total
+    total = total.copy()
+    total[:valeurs.size] += valeurs
+    return total
+
+
+class statistiques:
+    """
+    Réducteur pour le tracé par morceaux (moteur.scene.tracer_flux) : compte les segments, les rayons émis,
+    les segments de chaque génération et les impacts sur chaque surface sans conserver les segments.
+    """
+    def __init__(self):
+        self.segments = 0
+        self.rayons = 0
+        self.generations = np.zeros(0, dtype = np.int64)
+        self.impacts = np.zeros(0, dtype = np.int64)     #Nombre d'impacts par indice de surface (voir scene.surfaces)
+
+    def ajouter(self, resultat):
+        self.segments += len(resultat)
+        self.generations = _cumuler(self.generations, np.bincount(resultat.generation))
+        self.rayons = int(self.generations[0]) if self.generations.size else 0
+        touches = resultat.surface[resultat.surface >= 0]
+        self.impacts = _cumuler(self.impacts, np.bincount(touches))
+
+    def fusionner(self, autre):
+        #Ajoute les comptes d'un réducteur partiel (voir moteur.scene.tracer_parallele)
+        self.segments += autre.segments
+        self.generations = _cumuler(self.generations, autre.generations)
+        self.rayons = int(self.generations[0]) if self.generations.size else 0
+        self.impacts = _cumuler(self.impacts, autre.impacts)
+
+
+class histogramme_plan:
+    """
+    Réducteur pour le tracé par morceaux : histogramme des ordonnées où les segments traversent le plan x = x_plan.
+
+    ----------
+    x : float
+        Abscisse du plan d'observation.
+    ymin, ymax : float
+        Étendue de l'histogramme selon les ordonnées.
+    classes : int
+        Nombre de classes de l'histogramme.
+    """
+    def __init__(self, x, ymin, ymax, classes = 200):
+        self.x = x
+        self.bords = np.linspace(ymin, ymax, classes + 1)
+        self.comptes = np.zeros(classes, dtype = np.int64)
+
+    def ajouter(self, resultat):
+        x0, x1 = resultat.x0, resultat.x1
+        traverse = (np.minimum(x0, x1) <= self.x) & (np.maximum(x0, x1) > self.x)
+        y = resultat.y0[traverse] + np.tan(resultat.teta[traverse])*(self.x - x0[traverse])
+        self.comptes += np.histogram(y, self.bords)[0]
+
+    def fusionner(self, autre):
+        self.comptes += autre.comptes
+
+
+class histogramme_surface:
+    """
+    Réducteur pour le tracé par morceaux : histogramme des ordonnées des impacts sur une surface.
+
+    ----------
+    indice : int
+        Indice de la surface dans scene.surfaces().
+    ymin, ymax : float
+        Étendue de l'histogramme selon les ordonnées.
+    classes : int
+        Nombre de classes de l'histogramme.
+    """
+    def __init__(self, indice, ymin, ymax, classes = 200):
+        self.indice = indice
+        self.bords = np.linspace(ymin, ymax, classes + 1)
+        self.comptes = np.zeros(classes, dtype = np.int64)
+
+    def ajouter(self, resultat):
+        self.comptes += np.histogram(resultat.y1[resultat.surface == self.indice], self.bords)[0]
+
+    def fusionner(self, autre):
+        self.comptes += autre.comptes
+
+
+class impacts_detecteur:
+    """
+    Réducteur pour le tracé par morceaux : impacts des rayons sur un détecteur (voir Ray_simulator.detecteur),
+    copiés dans des tableaux préalloués agrandis par doublement lorsqu'ils sont pleins.
+    Pour un histogramme des impacts sans les conserver, voir histogramme_surface.
+
+    ----------
+    indice : int
+        Indice du détecteur dans scene.surfaces().
+    detecteur : detecteur
+        Détecteur, utilisé pour calculer la position des impacts le long de celui-ci (ordonnée des impacts si None).
+    capacite : int
+        Nombre d'impacts alloués au départ.
+    """
+    def __init__(self, indice, detecteur = None, capacite = 1024):
+        self.indice = indice
+        self.detecteur = detecteur
+        self.nombre = 0
+        self.colonnes = {"x": np.empty(capacite), "y": np.empty(capacite), "teta": np.empty(capacite),
+                         "generation": np.empty(capacite, dtype = np.int64)}
+
+    def __len__(self):
+        return self.nombre
+
+    #Impacts enregistrés (vues sur les colonnes, sans copie)
+    @property
+    def x(self):
+        return self.colonnes["x"][:self.nombre]
+
+    @property
+    def y(self):
+        return self.colonnes["y"][:self.nombre]
+
+    @property
+    def teta(self):
+        return self.colonnes["teta"][:self.nombre]
+
+    @property
+    def generation(self):
+        return self.colonnes["generation"][:self.nombre]
+
+    def enregistrer(self, x, y, teta, generation):
+        #Copie des impacts à la suite des précédents (même principe que moteur.reserve_segments)
+        N = np.size(x)
+        if self.nombre + N > self.colonnes["x"].size:
+            capacite = max(2*self.colonnes["x"].size, self.nombre + N)
+            for champ, colonne in self.colonnes.items():
+                self.colonnes[champ] = np.empty(capacite, dtype = colonne.dtype)
+                self.colonnes[champ][:self.nombre] = colonne[:self.nombre]
+        for champ, valeurs in zip(["x", "y", "teta", "generation"], [x, y, teta, generation]):
+            self.colonnes[champ][self.nombre:self.nombre + N] = valeurs
+        self.nombre += N
+
+    def ajouter(self, resultat):
+        touches = resultat.surface == self.indice
+        self.enregistrer(resultat.x1[touches], resultat.y1[touches], resultat.teta[touches], resultat.generation[touches])
+
+    def fusionner(self, autre):
+        self.enregistrer(autre.x, autre.y, autre.teta, autre.generation)
+
+    def position(self):
+        #Position des impacts le long du détecteur
+        if self.detecteur is None:
+            return self.y
+        return self.detecteur.coordonnee(self.x, self.y)
+
+    def resume(self):
+        """
+        Grandeurs résumant la tache formée par les impacts.
+
+        Retourne un dictionnaire contenant le nombre d'impacts, le barycentre des impacts (x, y) et leur position
+        moyenne le long du détecteur, le rayon RMS de la tache autour du barycentre, l'angle moyen des rayons et son écart type.
+        """
+        if not self.nombre:
+            return {"nombre": 0, "x": np.nan, "y": np.nan, "position": np.nan, "rms": np.nan, "angle": np.nan, "rms_angle": np.nan}
+        x, y = self.x.mean(), self.y.mean()
+        return {"nombre": self.nombre,
+                "x": x,
+                "y": y,
+                "position": self.position().mean(),
+                "rms": np.sqrt(np.mean((self.x - x)**2 + (self.y - y)**2)),
+                "angle": self.teta.mean(),
+                "rms_angle": self.teta.std()}
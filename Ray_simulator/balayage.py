@@ -0,0 +1,177 @@
+"""
+Balayage de paramètres : chaque point d'une grille (rayon et diamètre du miroir, ouverture de la source,
+indice et épaisseur d'une lentille...) est tracé sans affichage et résumé par des mesures de foyer et d'aberration.
+Le foyer de l'optique paraxiale (paraxial.py) est calculé sans tracer de rayons ; avec --paraxial, seul ce calcul
+est fait, pour trier rapidement les géométries avant un balayage exact.
+Avec --verre, la lentille est taillée dans un verre dispersif de materiaux.CATALOGUE (n est alors ignoré) : la source
+émet les raies F, d et C, les mesures d'aberration sphérique portent sur la raie d et l'aberration chromatique
+longitudinale (lca) et transverse (tca) est mesurée entre les trois raies.
+
+Exemple en ligne de commande (plage début:fin:nombre ou liste de valeurs séparées par des virgules) :
+
+    python balayage.py --rayon 5:15:11 --diametre 0.2:1.2:6 --ouverture 0.5 -o resultats.csv
+"""
+import argparse
+import itertools
+import multiprocessing
+
+import numpy as np
+
+from moteur import intervalles, tracer
+from Ray_simulator import miroir, dioptre, source
+from analyse import aberration_spherique, aberration_chromatique, meilleur_foyer
+from materiaux import CATALOGUE, LONGUEUR_ONDE, RAIES, materiau, dispersif
+from paraxial import systeme_paraxial
+
+#Valeurs par défaut : scénario d'Application_miroir (miroir en x = 7, source en x = -10), sans lentille
+DEFAUT = {"rayon": 10., "diametre": np.pi/6, "position": 7.,
+          "lentille": "aucune", "verre": "", "n": 1.5, "s": 0.5, "r_lentille": 12., "x_lentille": 0.,
+          "ouverture": np.pi/6, "inf": 1, "N": 500, "hauteur": 8., "exact": 1}
+
+GEOMETRIE = ["rayon", "diametre", "position", "n", "s", "r_lentille", "x_lentille"]    #Paramètres qui modifient les surfaces
+SOURCE = ["ouverture", "inf", "N", "hauteur"]   #Paramètres qui ne modifient que les rayons de départ
+MESURES = ["x_paraxial", "lsa_max", "tsa_max", "x_foyer", "rms", "rayons", "x_gauss", "focale_gauss", "lca", "tca", "lca_gauss"]
+
+#Dernière géométrie construite par le processus courant, réutilisée tant que seule la source change
+_cache = {"cle": None, "geometrie": None}
+
+
+def geometrie(parametres):
+    #Surfaces de la scène, structure d'accélération, système paraxial jusqu'au miroir
+    #et, pour un verre dispersif, systèmes paraxiaux des raies F et C
+    lst_dioptre = []
+    n = materiau(parametres["verre"] or parametres["n"])
+    if parametres["lentille"] != "aucune":
+        lst_dioptre = dioptre(None, parametres["x_lentille"], parametres["r_lentille"], parametres["s"], n, type = parametres["lentille"]).interfaces
+    lst_miroir = [miroir(None, x = parametres["position"], r = parametres["rayon"], diametre = parametres["diametre"])]
+
+    rebonds_max = len(lst_dioptre) + 1
+    chromatique = None
+    if lst_dioptre and dispersif(n):
+        chromatique = [systeme_paraxial(lst_dioptre, lst_miroir, rebonds_max = rebonds_max, longueur_onde = RAIES[raie]) for raie in ["F", "C"]]
+    return lst_dioptre, lst_miroir, intervalles(lst_dioptre, lst_miroir), systeme_paraxial(lst_dioptre, lst_miroir, rebonds_max = rebonds_max), chromatique
+
+
+def evaluer(point):
+    """
+    Trace un point de la grille et calcule ses mesures.
+
+    ----------
+    point : dict
+        Valeurs des paramètres de ce point, les autres paramètres prennent leur valeur de DEFAUT.
+
+    Retourne un dictionnaire contenant les mesures de MESURES (celles du tracé exact valent NaN si le paramètre exact est nul).
+    """
+    parametres = dict(DEFAUT, **point)
+
+    cle = tuple(parametres[nom] for nom in GEOMETRIE) + (parametres["lentille"], parametres["verre"])
+    if _cache["cle"] != cle:
+        _cache["cle"], _cache["geometrie"] = cle, geometrie(parametres)
+    lst_dioptre, lst_miroir, acceleration, systeme, chromatique = _cache["geometrie"]
+
+    #Foyer paraxial des rayons réfléchis : foyer image pour une source à l'infini, image de la source sinon
+    def foyer(systeme):
+        return systeme.cardinaux()["F_image"] if parametres["inf"] else systeme.image(-10)[0]
+
+    mesures = {"x_gauss": foyer(systeme), "focale_gauss": systeme.cardinaux()["focale"],
+               "lca_gauss": foyer(chromatique[0]) - foyer(chromatique[1]) if chromatique else 0.}
+    if not parametres["exact"]:
+        return dict({nom: np.nan for nom in MESURES}, rayons = 0, **mesures)
+
+    #Les mesures portent sur les rayons réfléchis par le miroir après la traversée éventuelle de la lentille
+    generation = len(lst_dioptre) + 1
+    longueurs_onde = [RAIES[raie] for raie in ["F", "d", "C"]] if chromatique else None
+    rayons = source(None, -10, 0, parametres["ouverture"], int(parametres["N"]), inf = bool(parametres["inf"]), height = parametres["hauteur"], longueurs_onde = longueurs_onde).rayons()
+    resultat = tracer(rayons, lst_dioptre, lst_miroir, rebonds_max = generation, acceleration = acceleration)
+
+    chromatique = aberration_chromatique(resultat, generation, reference = LONGUEUR_ONDE) if chromatique else {"lca": 0., "tca": 0.}
+    resultat = resultat[resultat.longueur_onde == LONGUEUR_ONDE]
+    aberration = aberration_spherique(resultat, generation)
+    x_foyer, rms = meilleur_foyer(resultat, generation)
+    vide = aberration["h"].size == 0
+
+    return {"x_paraxial": aberration["x_paraxial"],
+            "lsa_max": np.nan if vide else np.max(np.abs(aberration["lsa"])),
+            "tsa_max": np.nan if vide else np.max(np.abs(aberration["tsa"])),
+            "x_foyer": x_foyer,
+            "rms": rms,
+            "rayons": aberration["h"].size,
+            "lca": chromatique["lca"],
+            "tca": chromatique["tca"],
+            **mesures}
+
+
+def grille(plages):
+    """
+    Liste des points de la grille, produit cartésien des valeurs de chaque paramètre.
+    Les paramètres de la source varient le plus vite : des points successifs partagent la même géométrie.
+
+    ----------
+    plages : dict
+        Valeurs prises par chaque paramètre balayé.
+    """
+    noms = sorted(plages, key = lambda nom: nom in SOURCE)
+    return [dict(zip(noms, valeurs)) for valeurs in itertools.product(*[plages[nom] for nom in noms])]
+
+
+def balayer(plages, fixes = None, processus = None):
+    """
+    Évalue tous les points de la grille, en parallèle si processus est différent de 1.
+
+    ----------
+    plages : dict
+        Valeurs prises par chaque paramètre balayé (voir DEFAUT pour les noms).
+    fixes : dict
+        Paramètres non balayés qui remplacent les valeurs de DEFAUT.
+    processus : int
+        Nombre de processus (par défaut le nombre de cœurs).
+
+    Retourne un tableau sous forme de dictionnaire de colonnes : paramètres balayés puis mesures.
+    """
+    points = [dict(fixes or {}, **point) for point in grille(plages)]
+
+    if processus == 1:
+        lst_mesure = [evaluer(point) for point in points]
+    else:
+        with multiprocessing.Pool(processus) as pool:
+            #Des paquets de points consécutifs par processus pour profiter du cache de géométrie
+            paquet = max(1, len(points)//(4*(processus or multiprocessing.cpu_count())))
+            lst_mesure = pool.map(evaluer, points, chunksize = paquet)
+
+    noms = sorted(plages, key = lambda nom: nom in SOURCE)
+    tableau = {nom: np.array([point[nom] for point in points]) for nom in noms}
+    tableau.update({nom: np.array([mesure[nom] for mesure in lst_mesure]) for nom in MESURES})
+    return tableau
+
+
+def enregistrer(tableau, chemin):
+    #Écriture du tableau au format NPZ (extension .npz) ou CSV
+    if chemin.endswith(".npz"):
+        np.savez(chemin, **tableau)
+    else:
+        np.savetxt(chemin, np.column_stack(list(tableau.values())), delimiter = ",", header = ",".join(tableau), comments = "")
+
+
+def lire_plage(texte):
+    #"debut:fin:nombre" pour des valeurs régulièrement espacées, sinon une liste de valeurs séparées par des virgules
+    if ":" in texte:
+        debut, fin, nombre = texte.split(":")
+        return list(np.linspace(float(debut), float(fin), int(nombre)))
+    return [float(valeur) for valeur in texte.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Balayage de paramètres d'un miroir (et d'une lentille) sans affichage.")
+    for nom in GEOMETRIE + SOURCE:
+        parser.add_argument("--" + nom, type = lire_plage, help = "défaut : {}".format(DEFAUT[nom]))
+    parser.add_argument("--lentille", choices = ["aucune", "convergent", "divergent"], default = DEFAUT["lentille"])
+    parser.add_argument("--verre", choices = list(CATALOGUE), default = DEFAUT["verre"], help = "verre dispersif de la lentille (remplace n)")
+    parser.add_argument("--paraxial", action = "store_true", help = "optique paraxiale seulement, sans tracé de rayons")
+    parser.add_argument("-j", "--processus", type = int, default = None, help = "nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument("-o", "--sortie", default = "balayage.csv", help = "fichier de sortie .csv ou .npz")
+    arguments = parser.parse_args()
+
+    plages = {nom: getattr(arguments, nom) for nom in GEOMETRIE + SOURCE if getattr(arguments, nom) is not None}
+    tableau = balayer(plages, fixes = {"lentille": arguments.lentille, "verre": arguments.verre, "exact": 0 if arguments.paraxial else 1}, processus = arguments.processus)
+    enregistrer(tableau, arguments.sortie)
+    print("{} points enregistrés dans {}".format(len(next(iter(tableau.values()), [])), arguments.sortie))
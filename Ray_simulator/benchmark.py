@@ -0,0 +1,161 @@
+"""
+Mesures de performance du tracé et du rendu sur des scènes construites avec les classes de Ray_simulator.py.
+
+Pour chaque scène (miroir seul, lentille seule, lentille et miroir) et chaque nombre de rayons, on mesure :
+rayons tracés par seconde, durée d'un test d'intersection rayon/surface, pic de mémoire du tracé
+et durée du rendu matplotlib (backend Agg). Les résultats sont enregistrés en JSON pour comparer les versions.
+
+    python benchmark.py --rayons 100,1000,10000,100000,1000000 -o benchmark.json
+"""
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+import moteur
+from moteur import scene, faisceau, intersection_miroir, intersection_dioptre
+from Ray_simulator import rayon, source, miroir, dioptre
+
+RAYONS = [10**2, 10**3, 10**4, 10**5, 10**6]
+
+
+def scene_miroir(N):
+    #Scénario d'Application_miroir : miroir concave éclairé par une source à l'infini, plus un rayon isolé
+    return scene(lst_miroir = [miroir(None, x = 7, r = 10, diametre = np.pi/3)],
+                 lst_source = [source(None, -10, 0, np.pi/6, N - 1, inf = True, height = 8), rayon(None, -10, 1, 0.05)])
+
+
+def scene_lentille(N):
+    #Lentille convergente seule éclairée par une source ponctuelle
+    return scene(lst_dioptre = [dioptre(None, 0, 5, 1, 1.5, type = "convergent")],
+                 lst_source = [source(None, -10, 0, np.pi/12, N, inf = False)])
+
+
+def scene_mixte(N):
+    #Scène de Ray_simulator.py : lentille divergente puis miroir convexe
+    return scene(lst_miroir = [miroir(None, x = 15, r = -15, diametre = np.pi/4)],
+                 lst_dioptre = [dioptre(None, 0, 12, 0.5, 1.38, type = "divergent")],
+                 lst_source = [source(None, -10, 0, np.pi/12, N, inf = True, height = 4)])
+
+
+SCENES = {"miroir": scene_miroir, "lentille": scene_lentille, "mixte": scene_mixte}
+
+
+def chronometrer(fonction, repetitions):
+    #Meilleure durée sur plusieurs exécutions (la moins perturbée par le reste du système) et dernier résultat
+    meilleure = np.inf
+    for i in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        meilleure = min(meilleure, time.perf_counter() - debut)
+    return meilleure, resultat
+
+
+def test_intersection(objet, N, repetitions):
+    #Durée moyenne d'un test d'intersection rayon/surface, mesurée sur les fonctions du moteur pour N rayons
+    rayons = faisceau(-10, np.linspace(-4, 4, N), 0)
+    tests = []
+    for surface in objet.lst_dioptre:
+        tests.append(lambda surface = surface: intersection_dioptre(rayons, surface))
+    for surface in objet.lst_miroir:
+        tests.append(lambda surface = surface: intersection_miroir(rayons, surface))
+
+    duree, resultat = chronometrer(lambda: [test() for test in tests], repetitions)
+    return duree/(N*len(tests))
+
+
+def rendu(objet, resultat):
+    #Durée du tracé des surfaces et des segments puis du dessin complet de la figure
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from rendu import dessiner, dessiner_surface
+
+    fig, ax = plt.subplots()
+    debut = time.perf_counter()
+    for surface in objet.surfaces():
+        dessiner_surface(ax, surface, color = surface.color)
+    dessiner(ax, resultat, alpha = 0.2)
+    fig.canvas.draw()
+    duree = time.perf_counter() - debut
+    plt.close(fig)
+    return duree
+
+
+def mesurer(nom, N, repetitions = 3, rendu_max = 10**5):
+    """
+    Mesures d'une scène pour N rayons issus des sources.
+
+    ----------
+    nom : str
+        Nom de la scène dans SCENES.
+    N : int
+        Nombre de rayons.
+    repetitions : int
+        Nombre d'exécutions, la meilleure durée est retenue.
+    rendu_max : int
+        Nombre de rayons au-delà duquel le rendu n'est pas mesuré.
+
+    Retourne un dictionnaire des mesures.
+    """
+    #Tracé préalable non mesuré : compilation ou chargement du cache de Numba et premières allocations.
+    #Il compte assez de rayons pour que le mode "auto" choisisse le même noyau que pour N rayons
+    SCENES[nom](min(N, moteur.SEUIL_NUMBA)).tracer()
+
+    objet = SCENES[nom](N)
+    duree, resultat = chronometrer(objet.tracer, repetitions)
+
+    #Le pic de mémoire est mesuré sur une exécution séparée, tracemalloc ralentissant le tracé
+    tracemalloc.start()
+    objet.tracer()
+    memoire = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"scene": nom,
+            "rayons": N,
+            "segments": len(resultat),
+            "duree_trace": duree,
+            "rayons_par_seconde": N/duree,
+            "duree_test_intersection": test_intersection(objet, N, repetitions),
+            "pic_memoire": memoire,
+            "duree_rendu": rendu(objet, resultat) if N <= rendu_max else None}
+
+
+def environnement():
+    #Informations permettant de comparer des mesures faites sur des machines ou des versions différentes
+    import matplotlib
+    return {"date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "matplotlib": matplotlib.__version__,
+            "machine": platform.machine(),
+            "systeme": platform.platform(),
+            "processeur": platform.processor(),
+            "noyau": moteur.NOYAU}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Mesures de performance du tracé et du rendu.")
+    parser.add_argument("--scenes", default = ",".join(SCENES), help = "scènes séparées par des virgules ({})".format(", ".join(SCENES)))
+    parser.add_argument("--rayons", default = ",".join(str(N) for N in RAYONS), help = "nombres de rayons séparés par des virgules")
+    parser.add_argument("--repetitions", type = int, default = 3)
+    parser.add_argument("--rendu-max", type = int, default = 10**5, help = "nombre de rayons au-delà duquel le rendu n'est pas mesuré")
+    parser.add_argument("--noyau", choices = ["auto"] + moteur.NOYAUX, default = "auto", help = "implémentation du tracé (voir moteur.choisir_noyau)")
+    parser.add_argument("-o", "--sortie", default = "benchmark.json")
+    arguments = parser.parse_args()
+    moteur.choisir_noyau(arguments.noyau)
+
+    mesures = []
+    for nom in arguments.scenes.split(","):
+        for N in [int(valeur) for valeur in arguments.rayons.split(",")]:
+            mesures.append(mesurer(nom, N, arguments.repetitions, arguments.rendu_max))
+            m = mesures[-1]
+            print("{:>9} {:>8} rayons : {:10.3g} rayons/s, {:8.3g} ns/test, {:8.3g} Mo, rendu {}".format(
+                nom, N, m["rayons_par_seconde"], m["duree_test_intersection"]*1e9, m["pic_memoire"]/1e6,
+                "-" if m["duree_rendu"] is None else "{:.3g} s".format(m["duree_rendu"])))
+
+    with open(arguments.sortie, "w", encoding = "utf-8") as fichier:
+        json.dump({"environnement": environnement(), "mesures": mesures}, fichier, indent = 2)
@@ -0,0 +1,171 @@
+"""
+Description d'une scène dans un fichier JSON ou TOML et tracé de scènes sans interface graphique.
+
+Chaque objet est décrit par les paramètres de sa classe dans Ray_simulator.py (sans la figure) :
+
+    {
+        "trace": {"rebonds_max": 100, "portee": 20},
+        "miroirs": [{"x": 15, "r": -15, "diametre": 0.785, "color": "blue"}],
+        "lentilles": [{"x": 0, "r": 12, "s": 0.5, "n": 1.38, "type": "divergent"}],
+        "sources": [{"x": -10, "y": 0, "angle": 0.262, "N": 100, "inf": true, "height": 4}],
+        "rayons": [{"x": -10, "y": 1, "teta": 0.1}],
+        "detecteurs": [{"x": 10, "hauteur": 8}],
+        "affichage": {"xlim": [-20, 20], "ylim": [-15, 15]}
+    }
+
+Avec "densite": true dans "affichage", l'image montre la densité des rayons (voir rendu.densite) au lieu des segments,
+avec les options "resolution" ([largeur, hauteur] en pixels) et "echelle" ("log" ou "lineaire").
+
+L'indice "n" d'une lentille peut être le nom d'un verre de materiaux.CATALOGUE ("BK7") ou une formule de dispersion
+({"cauchy": [A, B, C]}), et une source peut émettre plusieurs longueurs d'onde ("longueurs_onde": [0.4861, 0.6563],
+en µm) : les segments sont alors dessinés de la couleur de leur longueur d'onde.
+
+Exemple en ligne de commande :
+
+    python fichier_scene.py scenes/*.json --format png --dossier resultats
+"""
+import argparse
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from moteur import scene, CHAMPS
+from Ray_simulator import rayon, source, miroir, dioptre, detecteur
+
+FORMATS = ["npz", "png"]
+
+
+def lire(chemin):
+    #Contenu d'un fichier de scène, au format JSON ou TOML selon son extension
+    if chemin.endswith(".toml"):
+        import tomllib  #Python 3.11 et plus
+        with open(chemin, "rb") as fichier:
+            return tomllib.load(fichier)
+    with open(chemin, encoding = "utf-8") as fichier:
+        return json.load(fichier)
+
+
+def construire_scene(description):
+    """
+    Création d'une scène à partir de sa description.
+
+    ----------
+    description : dict
+        Listes "miroirs", "lentilles", "sources", "rayons" et "detecteurs" des paramètres de chaque objet,
+        et paramètres de moteur.scene dans "trace".
+
+    Retourne un moteur.scene.
+    """
+    cles = {"trace", "miroirs", "lentilles", "sources", "rayons", "detecteurs", "affichage"}
+    inconnues = set(description) - cles
+    if inconnues:
+        raise ValueError("{} is not a valid scene section".format(", ".join(sorted(inconnues))))
+
+    lst_miroir = [miroir(None, **parametres) for parametres in description.get("miroirs", [])]
+    lst_dioptre = [dioptre(None, **parametres) for parametres in description.get("lentilles", [])]
+    lst_source = [source(None, **parametres) for parametres in description.get("sources", [])]
+    lst_source += [rayon(None, **parametres) for parametres in description.get("rayons", [])]
+    lst_detecteur = [detecteur(None, **parametres) for parametres in description.get("detecteurs", [])]
+
+    return scene(lst_miroir, lst_dioptre, lst_source, lst_detecteur = lst_detecteur, **description.get("trace", {}))
+
+
+def charger_scene(chemin):
+    #Scène décrite par un fichier JSON ou TOML
+    return construire_scene(lire(chemin))
+
+
+def etendue_carree(xlim, ylim, resolution):
+    #Étendue agrandie autour de son centre pour que les pixels de l'image soient carrés (axes de même échelle)
+    (x0, x1), (y0, y1) = xlim, ylim
+    largeur, hauteur = resolution
+    dx = max(x1 - x0, (y1 - y0)*largeur/hauteur, 1e-12)
+    dy = dx*hauteur/largeur
+    xc, yc = (x0 + x1)/2, (y0 + y1)/2
+    return (xc - dx/2, xc + dx/2), (yc - dy/2, yc + dy/2)
+
+
+def enregistrer_image(chemin, objet, resultat, affichage = None):
+    #Rendu de la scène dans un fichier image, sans fenêtre
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from rendu import dessiner, dessiner_densite, dessiner_spectre, dessiner_surface
+
+    affichage = affichage or {}
+    fig, ax = plt.subplots()
+    ax.grid(True)
+    ax.set_aspect("equal")
+    for surface in objet.surfaces():
+        dessiner_surface(ax, surface, color = surface.color)
+    if affichage.get("densite"):
+        #Image de densité des rayons (voir rendu.densite) sur l'étendue affichée, ou sur celle des segments
+        #(sans segment, il n'y a rien à accumuler : seules les surfaces sont dessinées)
+        if len(resultat):
+            resolution = affichage.get("resolution", (800, 600))
+            xlim = affichage.get("xlim", (min(resultat.x0.min(), resultat.x1.min()), max(resultat.x0.max(), resultat.x1.max())))
+            ylim = affichage.get("ylim", (min(resultat.y0.min(), resultat.y1.min()), max(resultat.y0.max(), resultat.y1.max())))
+            xlim, ylim = etendue_carree(xlim, ylim, resolution)
+            dessiner_densite(ax, resultat, resolution = resolution, echelle = affichage.get("echelle", "log"), xlim = xlim, ylim = ylim)
+    elif np.unique(resultat.longueur_onde).size > 1:
+        dessiner_spectre(ax, resultat, alpha = 0.2)
+    else:
+        dessiner(ax, resultat, alpha = 0.2)
+    if "xlim" in affichage:
+        ax.set_xlim(*affichage["xlim"])
+    if "ylim" in affichage:
+        ax.set_ylim(*affichage["ylim"])
+
+    fig.savefig(chemin, dpi = affichage.get("dpi", 100))
+    plt.close(fig)
+
+
+def traiter(chemin, dossier = None, format = "npz"):
+    """
+    Trace la scène d'un fichier et enregistre le résultat à côté de ce fichier (ou dans dossier).
+
+    ----------
+    chemin : str
+        Fichier de scène.
+    dossier : str
+        Dossier de sortie (par défaut celui du fichier de scène).
+    format : str
+        "npz" pour les segments (colonnes de moteur.resultat_trace) ou "png" pour une image de la scène.
+
+    Retourne le chemin du fichier écrit.
+    """
+    description = lire(chemin)
+    objet = construire_scene(description)
+    resultat = objet.tracer()
+
+    nom = os.path.splitext(os.path.basename(chemin))[0] + "." + format
+    sortie = os.path.join(dossier if dossier is not None else os.path.dirname(chemin), nom)
+    if format == "png":
+        enregistrer_image(sortie, objet, resultat, description.get("affichage"))
+    else:
+        np.savez(sortie, **{champ: getattr(resultat, champ) for champ in CHAMPS})
+    return sortie
+
+
+def _traiter(arguments):
+    #Version à un seul argument de traiter pour multiprocessing
+    return traiter(*arguments)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Tracé sans affichage de scènes décrites dans des fichiers JSON ou TOML.")
+    parser.add_argument("scenes", nargs = "+", help = "fichiers de scène")
+    parser.add_argument("-f", "--format", choices = FORMATS, default = "npz", help = "segments (npz) ou image (png)")
+    parser.add_argument("-d", "--dossier", default = None, help = "dossier de sortie (défaut : dossier de chaque scène)")
+    parser.add_argument("-j", "--processus", type = int, default = 1, help = "nombre de scènes tracées en parallèle")
+    arguments = parser.parse_args()
+
+    if arguments.dossier is not None:
+        os.makedirs(arguments.dossier, exist_ok = True)
+
+    taches = [(chemin, arguments.dossier, arguments.format) for chemin in arguments.scenes]
+    with multiprocessing.Pool(arguments.processus) as pool:
+        for chemin, sortie in zip(arguments.scenes, pool.imap(_traiter, taches)):
+            print("{} -> {}".format(chemin, sortie))
@@ -0,0 +1,93 @@
+"""
+Matériaux des lentilles : indice de réfraction fonction de la longueur d'onde (en µm), selon les formules de Cauchy
+ou de Sellmeier. Partout où un indice est attendu (dioptre, sous_dioptre), on peut donner un nombre (matériau non
+dispersif), un matériau de ce module ou le nom d'un verre de CATALOGUE.
+"""
+import numpy as np
+
+#Raies de Fraunhofer utilisées pour caractériser la dispersion (µm)
+RAIES = {"F": 0.4861, "d": 0.5876, "C": 0.6563}
+LONGUEUR_ONDE = RAIES["d"]  #Longueur d'onde des rayons pour lesquels aucune n'est précisée
+
+
+class cauchy:
+    """
+    Indice n = A + B/λ² + C/λ⁴.
+
+    ----------
+    A, B, C : float
+        Coefficients de Cauchy (B en µm², C en µm⁴).
+    """
+    def __init__(self, A, B = 0., C = 0.):
+        self.A = A
+        self.B = B
+        self.C = C
+
+    def indice(self, longueur_onde):
+        longueur_onde = np.asarray(longueur_onde, dtype = float)
+        return self.A + self.B/longueur_onde**2 + self.C/longueur_onde**4
+
+
+class sellmeier:
+    """
+    Indice n² = 1 + Σ B λ²/(λ² - C).
+
+    ----------
+    B : list
+        Coefficients B de Sellmeier.
+    C : list
+        Coefficients C de Sellmeier (µm²).
+    """
+    def __init__(self, B, C):
+        self.B = np.asarray(B, dtype = float)
+        self.C = np.asarray(C, dtype = float)
+
+    def indice(self, longueur_onde):
+        carre = np.asarray(longueur_onde, dtype = float)[..., np.newaxis]**2
+        return np.sqrt(1 + np.sum(self.B*carre/(carre - self.C), axis = -1))
+
+
+#Quelques verres courants (coefficients de Sellmeier des catalogues des fabricants)
+CATALOGUE = {"BK7": sellmeier([1.03961212, 0.231792344, 1.01046945], [0.00600069867, 0.0200179144, 103.560653]),
+             "F2": sellmeier([1.34533359, 0.209073176, 0.937357162], [0.00997743871, 0.0470450767, 111.886764]),
+             "silice": sellmeier([0.6961663, 0.4079426, 0.8974794], [0.0684043**2, 0.1162414**2, 9.896161**2])}
+
+
+def materiau(description):
+    """
+    Matériau correspondant à une description de fichier de scène ou de paramètre.
+
+    ----------
+    description : float, str, dict ou matériau
+        Indice constant, nom d'un verre de CATALOGUE, {"cauchy": [A, B, C]}, {"sellmeier": {"B": [...], "C": [...]}}
+        ou matériau déjà construit (renvoyé tel quel).
+    """
+    if isinstance(description, str):
+        if description not in CATALOGUE:
+            raise ValueError("{} is not a known glass".format(description))
+        return CATALOGUE[description]
+    if isinstance(description, dict):
+        if "cauchy" in description:
+            return cauchy(*description["cauchy"])
+        if "sellmeier" in description:
+            return sellmeier(**description["sellmeier"])
+        raise ValueError("{} is not a valid material".format(description))
+    return description
+
+
+def indice(n, longueur_onde = LONGUEUR_ONDE):
+    #Indice d'un matériau (ou d'un nombre) pour chaque longueur d'onde
+    if hasattr(n, "indice"):
+        return n.indice(longueur_onde)
+    return n
+
+
+def dispersif(n):
+    #Vrai si l'indice dépend de la longueur d'onde
+    return hasattr(n, "indice")
+
+
+def nombre_abbe(n):
+    #Nombre d'Abbe (n_d - 1)/(n_F - n_C) : plus il est grand, moins le matériau est dispersif
+    n_F, n_d, n_C = [indice(n, RAIES[raie]) for raie in ["F", "d", "C"]]
+    return (n_d - 1)/(n_F - n_C) if n_F != n_C else np.inf
@@ -0,0 +1,840 @@
+import copy
+import importlib.util
+import json
+import os
+import time
+
+import numpy as np
+
+from materiaux import LONGUEUR_ONDE, indice, dispersif
+
+LONGUEUR_MIN = 1e-6    #Distance minimale entre l'origine d'un rayon et son point d'impact (remplace la sécurité round(X1) == round(x))
+TOLERANCE = 1e-9    #Tolérance sur les bornes des surfaces (un rayon sur l'axe touche le sommet à l'erreur d'arrondi près)
+REBONDS_MAX = 100   #Nombre maximal de réflexions/réfractions suivies pour un rayon issu d'une source
+NOYAUX = ["numpy", "numba"]     #Implémentations disponibles des calculs d'intersection, de réflexion et de réfraction
+NUMBA_DISPONIBLE = importlib.util.find_spec("numba") is not None    #Numba n'est importé qu'au premier tracé qui l'utilise
+SEUIL_NUMBA = 5000  #En mode "auto", nombre de rayons à partir duquel le noyau compilé compense le chargement de Numba
+
+
+def choisir_noyau(nom = "auto"):
+    """
+    Choix de l'implémentation des calculs d'intersection, de réflexion et de réfraction.
+
+    ----------
+    nom : str
+        "numpy", "numba" (noyau compilé, voir noyaux.py) ou "auto" (numba s'il est installé pour les faisceaux
+        d'au moins SEUIL_NUMBA rayons, numpy sinon : un petit tracé ne charge pas Numba).
+    """
+    global NOYAU
+    if nom not in NOYAUX + ["auto"]:
+        raise ValueError("{} is not a valid kernel".format(nom))
+    if nom == "numba" and not NUMBA_DISPONIBLE:
+        raise ImportError("numba is not installed")
+    NOYAU = nom
+
+
+choisir_noyau(os.environ.get("RAY_SIMULATOR_NOYAU", "auto"))   #Choix possible avant l'import par la variable d'environnement
+
+
+class faisceau:
+    """
+    Ensemble de N rayons lumineux stockés sous forme de tableaux NumPy.
+    Chaque surface est testée pour tout le faisceau en une seule passe vectorisée.
+
+    ----------
+    x : array
+        Abscisses des points d'origine des rayons.
+    y : array
+        Ordonnées des points d'origine des rayons.
+    teta : array
+        Angles des rayons par rapport à l'axe des abscisses.
+    direction : array de bool
+        Direction de propagation des rayons (True = vers la droite)
+    generation : array d'int
+        Nombre d'interactions subies depuis la source (0 = rayon issu d'une source)
+    parent : array d'int
+        Indice du segment dont le rayon est issu dans le résultat du tracé (-1 pour un rayon issu d'une source)
+    longueur_onde : array
+        Longueur d'onde des rayons (µm) : plusieurs couleurs sont tracées ensemble dans le même faisceau
+    """
+    def __init__(self, x, y, teta, direction = True, generation = 0, parent = -1, longueur_onde = LONGUEUR_ONDE):
+        self.teta = np.atleast_1d(np.asarray(teta, dtype = float))
+        self.x = np.atleast_1d(np.asarray(x, dtype = float))
+        self.y = np.atleast_1d(np.asarray(y, dtype = float))
+
+        #Tous les paramètres sont ramenés à la même taille (un scalaire est répété pour chaque rayon, un tableau vide donne un faisceau vide)
+        N = np.broadcast_shapes(self.teta.shape, self.x.shape, self.y.shape)[0]
+        self.teta = np.broadcast_to(self.teta, N).copy()
+        self.x = np.broadcast_to(self.x, N).copy()
+        self.y = np.broadcast_to(self.y, N).copy()
+        self.direction = np.broadcast_to(np.asarray(direction, dtype = bool), N).copy()
+        self.generation = np.broadcast_to(np.asarray(generation, dtype = int), N).copy()
+        self.parent = np.broadcast_to(np.asarray(parent, dtype = np.int64), N).copy()
+        self.longueur_onde = np.broadcast_to(np.asarray(longueur_onde, dtype = float), N).copy()
+
+        self.pente = np.tan(self.teta)     #Pente des rayons, calculée une seule fois pour toutes les surfaces
+        self.sens = np.where(self.direction, 1.0, -1.0)    #+1 vers la droite, -1 vers la gauche
+
+    def __len__(self):
+        return self.teta.size
+
+    def __getitem__(self, masque):
+        #Sous-faisceau contenant uniquement les rayons sélectionnés
+        return faisceau(self.x[masque], self.y[masque], self.teta[masque], self.direction[masque], self.generation[masque], self.parent[masque], self.longueur_onde[masque])
+
+    def interaction(self, lst_dioptre, lst_miroir, portee = 20, longueur_min = LONGUEUR_MIN, acceleration = None, stats = None, lst_detecteur = ()):
+        """
+        Propage tous les rayons jusqu'à leur premier obstacle (dioptre, miroir ou détecteur).
+
+        ----------
+        lst_dioptre : list
+            Interfaces (sous_dioptre) de la scène.
+        lst_miroir : list
+            Miroirs de la scène.
+        portee : float
+            Distance maximale parcourue selon l'axe des abscisses par un rayon qui ne rencontre rien.
+        longueur_min : float
+            Distance en dessous de laquelle un point d'impact est ignoré.
+        acceleration : intervalles
+            Structure d'accélération des surfaces (construite à partir des listes si elle n'est pas fournie).
+        stats : statistiques_trace
+            Compteurs et durées à mettre à jour (aucune mesure si None).
+        lst_detecteur : list
+            Détecteurs de la scène.
+
+        Retourne les abscisses et ordonnées de fin de chaque rayon, l'indice de la surface touchée
+        (indice dans lst_dioptre + lst_miroir + lst_detecteur, -1 si aucune) et le faisceau des rayons réfléchis/réfractés
+        (dont le parent est l'indice du rayon d'origine dans ce faisceau, voir tracer).
+        """
+        if acceleration is None:
+            acceleration = intervalles(lst_dioptre, lst_miroir, lst_detecteur)
+
+        N = len(self)
+        if stats is not None:
+            stats.demarrer()
+
+        if N and (NOYAU == "numba" or (NOYAU == "auto" and NUMBA_DISPONIBLE and N >= SEUIL_NUMBA)):
+            import noyaux
+            x_fin = np.empty(N)
+            surface = np.empty(N, dtype = np.int64)
+            teta_enfant = np.empty(N)
+            direction_enfant = np.empty(N, dtype = bool)
+
+            #Le noyau compilé n'a qu'un indice par interface : avec des matériaux dispersifs, il est appelé pour chaque longueur d'onde
+            lst_longueur_onde = np.unique(self.longueur_onde) if acceleration.dispersif else [None]
+            for longueur_onde in lst_longueur_onde:
+                rayons = slice(None) if longueur_onde is None else np.flatnonzero(self.longueur_onde == longueur_onde)
+                cercles = acceleration.cercles if longueur_onde is None else acceleration.cercles_longueur_onde(longueur_onde)
+
+                #Tout le parcours des surfaces (boîte englobante, intersection, impact le plus proche, nouvel angle) en une boucle compilée
+                x_fin[rayons], surface[rayons], teta_enfant[rayons], direction_enfant[rayons], tests, evites, rejetees = noyaux.interaction(
+                    self.x[rayons], self.y[rayons], self.teta[rayons], self.pente[rayons], self.direction[rayons], acceleration.droite, acceleration.gauche,
+                    acceleration.boites, cercles, acceleration.nb_dioptre, acceleration.premier_detecteur, float(portee), longueur_min, TOLERANCE)
+                if stats is not None:
+                    stats.tests_intersection += tests
+                    stats.tests_evites += evites
+                    stats.racines_rejetees += rejetees
+            if stats is not None:
+                stats.top("intersection")
+            return self.enfants(x_fin, surface, teta_enfant, direction_enfant, acceleration.nb_dioptre, acceleration.premier_detecteur, stats)
+
+        distance = np.full(N, float(portee))   #Distance au plus proche point d'impact trouvé
+        surface = np.full(N, -1)
+        x_fin = self.x + self.sens*portee
+        teta_enfant = np.full(N, np.nan)
+        direction_enfant = self.direction.copy()
+
+        #Les rayons allant vers la droite et vers la gauche parcourent les surfaces dans des ordres opposés
+        for direction in [True, False]:
+            rayons = np.flatnonzero(self.direction == direction)
+
+            for i in acceleration.ordre(direction):
+                if not rayons.size:
+                    break
+                objet = acceleration.surfaces[i]
+                if stats is not None:
+                    stats.demarrer()
+
+                #Portion de l'axe des abscisses encore parcourue par chaque rayon (jusqu'au point d'impact le plus proche trouvé)
+                x0 = self.x[rayons]
+                x1 = x_fin[rayons]
+                bas, haut = (x0, x1) if direction else (x1, x0)
+
+                #Les surfaces sont triées : si celle-ci commence après la fin de tous les rayons, les suivantes aussi
+                atteints = (haut >= acceleration.xmin[i] - TOLERANCE) if direction else (bas <= acceleration.xmax[i] + TOLERANCE)
+                if not atteints.any():
+                    break
+
+                #Seuls les rayons dont le trajet restant croise la boîte englobante de la surface sont testés
+                y0 = self.y[rayons]
+                y1 = y0 + self.pente[rayons]*(x1 - x0)
+                candidats = rayons[(haut >= acceleration.xmin[i] - TOLERANCE) & (bas <= acceleration.xmax[i] + TOLERANCE)
+                                   & (np.maximum(y0, y1) >= acceleration.ymin[i]) & (np.minimum(y0, y1) <= acceleration.ymax[i])]
+                if stats is not None:
+                    #Comme dans noyaux.interaction : seuls les rayons qui atteignent encore la surface comptent
+                    stats.tests_evites += int(np.count_nonzero(atteints)) - candidats.size
+                if not candidats.size:
+                    continue
+
+                touches = self[candidats]
+                est_dioptre = i < acceleration.nb_dioptre
+                est_detecteur = i >= acceleration.premier_detecteur
+                if est_dioptre:
+                    X, Y, valide = intersection_dioptre(touches, objet)
+                elif est_detecteur:
+                    X, Y, valide = intersection_detecteur(touches, objet)
+                else:
+                    X, Y, valide = intersection_miroir(touches, objet)
+
+                #On ne garde que les points d'impact situés devant le rayon et plus proches que ceux déjà trouvés
+                d = (X - touches.x)*touches.sens
+                plus_proche = valide & (d > longueur_min) & (d < distance[candidats])
+                if stats is not None:
+                    stats.tests_intersection += candidats.size
+                    stats.racines_rejetees += int(np.count_nonzero(~valide))
+                    stats.top("intersection")
+                if not plus_proche.any():
+                    continue
+
+                indices = candidats[plus_proche]
+                distance[indices] = d[plus_proche]
+                surface[indices] = i
+                x_fin[indices] = X[plus_proche]
+
+                #Calcul de l'angle (et de la direction) du rayon créé au point d'impact
+                if est_dioptre:
+                    teta, direction_nouvelle = refraction(touches[plus_proche], objet, X[plus_proche], Y[plus_proche])
+                elif est_detecteur:
+                    teta, direction_nouvelle = traversee(touches[plus_proche], objet)
+                else:
+                    teta, direction_nouvelle = reflexion(touches[plus_proche], objet, X[plus_proche], Y[plus_proche])
+                teta_enfant[indices] = teta
+                direction_enfant[indices] = direction_nouvelle
+                if stats is not None:
+                    stats.top("creation")
+
+        if stats is not None:
+            stats.demarrer()
+        return self.enfants(x_fin, surface, teta_enfant, direction_enfant, acceleration.nb_dioptre, acceleration.premier_detecteur, stats)
+
+    def enfants(self, x_fin, surface, teta_enfant, direction_enfant, nb_dioptre, premier_detecteur, stats = None):
+        #Fin des segments et faisceau des rayons réfléchis/réfractés aux points d'impact (voir interaction)
+        y_fin = (x_fin - self.x)*self.pente + self.y
+
+        #Les rayons totalement réfléchis dans une lentille (arcsin impossible) ou arrêtés par un détecteur ne sont pas prolongés
+        #Un rayon qui traverse un détecteur transparent reste dans la même génération (ce n'est pas une interaction optique)
+        nouveaux = (surface >= 0) & np.isfinite(teta_enfant)
+        generation = self.generation[nouveaux] + (surface[nouveaux] < premier_detecteur)
+        enfants = faisceau(x_fin[nouveaux], y_fin[nouveaux], teta_enfant[nouveaux], direction_enfant[nouveaux], generation, np.flatnonzero(nouveaux), self.longueur_onde[nouveaux])
+
+        if stats is not None:
+            stats.impacts += int(np.count_nonzero(surface >= 0))
+            stats.reflexions_totales += int(np.count_nonzero((surface >= 0) & (surface < nb_dioptre) & ~np.isfinite(teta_enfant)))
+            stats.top("creation")
+
+        return x_fin, y_fin, surface, enfants
+
+
+class intervalles:
+    """
+    Structure d'accélération : les boîtes englobantes des surfaces sont triées selon l'axe des abscisses.
+    Un rayon ne teste que les surfaces situées sur son trajet, de la plus proche à la plus éloignée,
+    et le parcours s'arrête dès que les surfaces restantes commencent après le point d'impact déjà trouvé.
+
+    ----------
+    lst_dioptre : list
+        Interfaces (sous_dioptre) de la scène.
+    lst_miroir : list
+        Miroirs de la scène.
+    lst_detecteur : list
+        Détecteurs de la scène.
+    """
+    def __init__(self, lst_dioptre, lst_miroir, lst_detecteur = ()):
+        self.surfaces = list(lst_dioptre) + list(lst_miroir) + list(lst_detecteur)   #Les indices restent ceux de lst_dioptre + lst_miroir + lst_detecteur
+        self.nb_dioptre = len(lst_dioptre)
+        self.premier_detecteur = self.nb_dioptre + len(lst_miroir)     #Indice du premier détecteur
+
+        #Boîtes englobantes (bornes calculées une fois par chaque surface)
+        self.xmin = np.array([objet.xmin for objet in self.surfaces], dtype = float)
+        self.xmax = np.array([objet.xmax for objet in self.surfaces], dtype = float)
+        self.ymin = np.array([objet.min for objet in self.surfaces], dtype = float)
+        self.ymax = np.array([objet.max for objet in self.surfaces], dtype = float)
+        self.boites = np.column_stack([self.xmin, self.xmax, self.ymin, self.ymax]).reshape(-1, 4)
+
+        #Cercle de chaque surface pour le noyau compilé : centre, rayon, solution de gauche, sommet (miroir) et indices (dioptre)
+        #Pour un détecteur : extrémités du segment et transparence
+        self.dispersif = any(dispersif(objet.n_left) or dispersif(objet.n_right) for objet in self.surfaces[:self.nb_dioptre])
+        self.cercles = self.cercles_longueur_onde(LONGUEUR_ONDE)
+
+        self.droite = np.argsort(self.xmin, kind = "stable")   #Ordre de parcours des rayons allant vers la droite
+        self.gauche = np.argsort(-self.xmax, kind = "stable")  #Ordre de parcours des rayons allant vers la gauche
+
+    def ordre(self, direction):
+        return self.droite if direction else self.gauche
+
+    def cercles_longueur_onde(self, longueur_onde):
+        #Tableau des cercles (voir __init__) avec les indices des interfaces à cette longueur d'onde
+        return np.array([(objet.c, objet.r, objet.side, 0, indice(objet.n_left, longueur_onde), indice(objet.n_right, longueur_onde)) for objet in self.surfaces[:self.nb_dioptre]]
+                        + [(objet.x - objet.r, objet.r, objet.r < 0, objet.x, 1, 1) for objet in self.surfaces[self.nb_dioptre:self.premier_detecteur]]
+                        + [(objet.xa, objet.ya, objet.xb, objet.yb, objet.transparent, 0) for objet in self.surfaces[self.premier_detecteur:]], dtype = float).reshape(-1, 6)
+
+
+class resultat_trace:
+    """
+    Segments parcourus par les rayons lors d'un tracé, sous forme de tableaux (aucune dépendance à matplotlib).
+
+    ----------
+    x0, y0 : array
+        Points de départ des segments.
+    x1, y1 : array
+        Points d'arrivée des segments.
+    teta : array
+        Angles des segments par rapport à l'axe des abscisses.
+    generation : array d'int
+        Nombre d'interactions subies depuis la source (0 = rayon issu d'une source)
+    surface : array d'int
+        Indice de la surface touchée en fin de segment (dans lst_dioptre + lst_miroir + lst_detecteur, -1 si aucune)
+    parent : array d'int
+        Indice du segment précédent du même rayon (-1 pour un segment issu d'une source)
+    longueur_onde : array
+        Longueur d'onde du rayon (µm)
+    """
+    def __init__(self, x0, y0, x1, y1, teta, generation, surface, parent = -1, longueur_onde = LONGUEUR_ONDE):
+        self.x0 = np.asarray(x0, dtype = float)
+        self.y0 = np.asarray(y0, dtype = float)
+        self.x1 = np.asarray(x1, dtype = float)
+        self.y1 = np.asarray(y1, dtype = float)
+        self.teta = np.asarray(teta, dtype = float)
+        self.generation = np.asarray(generation, dtype = int)
+        self.surface = np.asarray(surface, dtype = int)
+        self.parent = np.asarray(parent, dtype = np.int64)
+        if self.parent.shape != self.x0.shape:     #Parent commun à tous les segments (-1 par défaut)
+            self.parent = np.full(self.x0.shape, self.parent)
+        self.longueur_onde = np.asarray(longueur_onde, dtype = float)
+        if self.longueur_onde.shape != self.x0.shape:
+            self.longueur_onde = np.full(self.x0.shape, self.longueur_onde)
+
+    def __len__(self):
+        return self.x0.size
+
+    def segments(self):
+        #Tableau (N, 2, 2) des extrémités des segments, directement utilisable par une LineCollection
+        return np.stack([np.column_stack([self.x0, self.y0]), np.column_stack([self.x1, self.y1])], axis = 1)
+
+    def __getitem__(self, masque):
+        #Sous-ensemble des segments sélectionnés
+        return resultat_trace(self.x0[masque], self.y0[masque], self.x1[masque], self.y1[masque], self.teta[masque], self.generation[masque], self.surface[masque], self.parent[masque], self.longueur_onde[masque])
+
+
+CHAMPS = ["x0", "y0", "x1", "y1", "teta", "generation", "surface", "parent", "longueur_onde"]   #Colonnes d'un resultat_trace
+
+
+def concatener(lst_resultat, decaler_parents = False):
+    """
+    Regroupe plusieurs resultat_trace en un seul.
+
+    ----------
+    lst_resultat : list
+        Résultats à regrouper.
+    decaler_parents : bool
+        Résultats de tracés indépendants (morceaux d'une source) : les indices des parents de chaque résultat
+        sont décalés de la position de ce résultat dans le regroupement.
+    """
+    if not lst_resultat:
+        return resultat_trace(*[np.empty(0) for champ in CHAMPS])
+    colonnes = {champ: np.concatenate([getattr(resultat, champ) for resultat in lst_resultat]) for champ in CHAMPS}
+
+    if decaler_parents:
+        debut = np.repeat(np.cumsum([0] + [len(resultat) for resultat in lst_resultat[:-1]]), [len(resultat) for resultat in lst_resultat])
+        colonnes["parent"] = np.where(colonnes["parent"] >= 0, colonnes["parent"] + debut, -1)
+    return resultat_trace(**colonnes)
+
+
+class reserve_segments:
+    """
+    Réserve de segments préallouée : une colonne NumPy par champ de resultat_trace, agrandie par doublement
+    lorsqu'elle est pleine. Les segments de chaque génération y sont copiés directement, sans liste de
+    résultats intermédiaires ni concaténation finale. Une même réserve peut servir à plusieurs tracés.
+
+    ----------
+    capacite : int
+        Nombre de segments alloués au départ.
+    """
+    def __init__(self, capacite = 1024):
+        self.nombre = 0     #Nombre de segments écrits
+        self.colonnes = {champ: np.empty(max(capacite, 1), dtype = np.int64 if champ in ["generation", "surface", "parent"] else float) for champ in CHAMPS}
+
+    def __len__(self):
+        return self.nombre
+
+    def reserver(self, nombre):
+        #Agrandit les colonnes pour pouvoir écrire nombre segments de plus
+        capacite = self.colonnes["x0"].size
+        if self.nombre + nombre <= capacite:
+            return
+        capacite = max(2*capacite, self.nombre + nombre)
+        for champ, colonne in self.colonnes.items():
+            self.colonnes[champ] = np.empty(capacite, dtype = colonne.dtype)
+            self.colonnes[champ][:self.nombre] = colonne[:self.nombre]
+
+    def ajouter_segments(self, x0, y0, x1, y1, teta, generation, surface, parent, longueur_onde = LONGUEUR_ONDE):
+        #Écrit les segments à la suite des précédents
+        N = np.size(x0)
+        self.reserver(N)
+        for champ, valeurs in zip(CHAMPS, [x0, y0, x1, y1, teta, generation, surface, parent, longueur_onde]):
+            self.colonnes[champ][self.nombre:self.nombre + N] = valeurs
+        self.nombre += N
+
+    def resultat(self, debut = 0):
+        #Segments écrits depuis l'indice debut (vues sur les colonnes, sans copie)
+        return resultat_trace(**{champ: colonne[debut:self.nombre] for champ, colonne in self.colonnes.items()})
+
+    def vider(self):
+        #Les segments suivants réutilisent la mémoire déjà allouée (les résultats précédents sont écrasés)
+        self.nombre = 0
+
+
+class statistiques_trace:
+    """
+    Compteurs et durées des étapes d'un ou plusieurs tracés, à passer en argument stats de tracer ou de scene.tracer.
+    Sans cet objet (stats = None) le tracé ne fait aucune mesure.
+
+    Compteurs : tests d'intersection rayon/surface, tests évités par les boîtes englobantes (couples rayon/surface
+    dont le trajet restant atteint l'abscisse de la surface mais pas sa boîte, même définition pour les deux noyaux), racines rejetées
+    (pas d'intersection ou point hors de la surface), impacts, réflexions totales, rayons par génération et profondeur maximale.
+    Durées (s) : preparation (structure d'accélération), intersection, creation (rayons réfléchis/réfractés) et rendu (voir rendu.dessiner).
+    """
+    def __init__(self):
+        self.tests_intersection = 0
+        self.tests_evites = 0
+        self.racines_rejetees = 0
+        self.impacts = 0
+        self.reflexions_totales = 0
+        self.rayons_par_generation = []
+        self.durees = {"preparation": 0., "intersection": 0., "creation": 0., "rendu": 0.}
+        self._top = time.perf_counter()
+
+    @property
+    def profondeur_max(self):
+        #Génération la plus élevée atteinte par un rayon
+        return len(self.rayons_par_generation) - 1
+
+    def generation(self, numero, nombre):
+        #Ajoute nombre rayons à la génération numero
+        if numero >= len(self.rayons_par_generation):
+            self.rayons_par_generation.extend([0]*(numero + 1 - len(self.rayons_par_generation)))
+        self.rayons_par_generation[numero] += nombre
+
+    def demarrer(self):
+        #Début d'une étape chronométrée
+        self._top = time.perf_counter()
+
+    def top(self, etape):
+        #Ajoute à etape la durée écoulée depuis le début de l'étape, puis démarre l'étape suivante
+        maintenant = time.perf_counter()
+        self.durees[etape] = self.durees.get(etape, 0.) + maintenant - self._top
+        self._top = maintenant
+
+    def dictionnaire(self):
+        return {"tests_intersection": self.tests_intersection,
+                "tests_evites": self.tests_evites,
+                "racines_rejetees": self.racines_rejetees,
+                "impacts": self.impacts,
+                "reflexions_totales": self.reflexions_totales,
+                "rayons_par_generation": list(self.rayons_par_generation),
+                "profondeur_max": self.profondeur_max,
+                "durees": dict(self.durees)}
+
+    def enregistrer(self, chemin):
+        #Écriture des mesures au format JSON
+        with open(chemin, "w", encoding = "utf-8") as fichier:
+            json.dump(self.dictionnaire(), fichier, indent = 2)
+
+
+class scene:
+    """
+    Scène optique indépendante de tout affichage : une scène en entrée, des tableaux de segments en sortie.
+    Le rendu (voir rendu.dessiner) est une étape séparée et facultative.
+
+    ----------
+    lst_miroir : list
+        Miroirs de la scène.
+    lst_dioptre : list
+        Lentilles (dioptre) ou interfaces (sous_dioptre) de la scène.
+    lst_source : list
+        Sources de rayons (tout objet possédant une méthode rayons() renvoyant un faisceau).
+    rebonds_max : int
+        Nombre maximal d'interactions suivies pour chaque rayon.
+    longueur_min : float
+        Distance en dessous de laquelle un point d'impact est ignoré.
+    portee : float
+        Distance maximale parcourue selon l'axe des abscisses par un rayon qui ne rencontre rien.
+    lst_detecteur : list
+        Détecteurs de la scène (voir analyse.impacts_detecteur pour enregistrer leurs impacts).
+    """
+    def __init__(self, lst_miroir = (), lst_dioptre = (), lst_source = (), rebonds_max = REBONDS_MAX, longueur_min = LONGUEUR_MIN, portee = 20, lst_detecteur = ()):
+        self.lst_miroir = list(lst_miroir)
+        self.lst_detecteur = list(lst_detecteur)
+        self.lst_source = list(lst_source)
+        self.rebonds_max = rebonds_max
+        self.longueur_min = longueur_min
+        self.portee = portee
+
+        #Les lentilles sont remplacées par leurs deux interfaces
+        self.lst_dioptre = []
+        for objet in lst_dioptre:
+            self.lst_dioptre.extend(getattr(objet, "interfaces", [objet]))
+
+    def surfaces(self):
+        #Liste des surfaces dans l'ordre des indices de resultat_trace.surface
+        return self.lst_dioptre + self.lst_miroir + self.lst_detecteur
+
+    def tracer(self, stats = None):
+        #Tous les rayons de toutes les sources sont propagés ensemble dans un seul faisceau (stats : voir statistiques_trace)
+        lst_faisceau = [objet.rayons() for objet in self.lst_source]
+        if not lst_faisceau:
+            return concatener([])
+        rayons = faisceau(*[np.concatenate([getattr(f, champ) for f in lst_faisceau]) for champ in ["x", "y", "teta", "direction", "generation", "parent", "longueur_onde"]])
+
+        return tracer(rayons, self.lst_dioptre, self.lst_miroir, rebonds_max = self.rebonds_max, longueur_min = self.longueur_min, portee = self.portee, stats = stats, lst_detecteur = self.lst_detecteur)
+
+    def tracer_flux(self, reducteurs, taille = 100000, stats = None):
+        """
+        Trace les sources par morceaux de taille rayons : chaque morceau est tracé, transmis aux réducteurs puis abandonné.
+        La mémoire utilisée ne dépend que de la taille des morceaux, pas du nombre total de rayons.
+
+        ----------
+        reducteurs : list
+            Objets possédant une méthode ajouter(resultat) qui accumule ce qui doit être conservé (voir analyse.statistiques).
+            Le résultat transmis est écrasé par le morceau suivant : un réducteur ne doit pas en garder de référence.
+        taille : int
+            Nombre de rayons par morceau.
+        stats : statistiques_trace
+            Compteurs et durées cumulés sur tous les morceaux (aucune mesure si None).
+
+        Retourne la liste des réducteurs.
+        """
+        if stats is not None:
+            stats.demarrer()
+        acceleration = intervalles(self.lst_dioptre, self.lst_miroir, self.lst_detecteur)  #Construite une seule fois pour tous les morceaux
+        if stats is not None:
+            stats.top("preparation")
+
+        reserve = reserve_segments(2*taille)     #Mémoire des segments réutilisée d'un morceau à l'autre
+
+        for objet in self.lst_source:
+            #Les objets sans méthode morceaux() (un rayon seul par exemple) forment un unique morceau
+            morceaux = objet.morceaux(taille) if hasattr(objet, "morceaux") else [objet.rayons()]
+            for rayons in morceaux:
+                reserve.vider()
+                resultat = tracer(rayons, self.lst_dioptre, self.lst_miroir, rebonds_max = self.rebonds_max, longueur_min = self.longueur_min, portee = self.portee, acceleration = acceleration, stats = stats, reserve = reserve, lst_detecteur = self.lst_detecteur)
+                for reducteur in reducteurs:
+                    reducteur.ajouter(resultat)
+
+        return reducteurs
+
+    def tracer_adaptatif(self, indice = 0, N = 33, tolerance = 1e-3, niveaux_max = 16, rayons_max = 100000):
+        """
+        Échantillonnage adaptatif d'une source : un faisceau grossier de N rayons est tracé, puis un rayon est tracé
+        au milieu de chaque intervalle entre deux rayons voisins. Un intervalle est à nouveau coupé en deux si le
+        rayon du milieu ne touche pas les mêmes surfaces que ses voisins, ou si son point d'arrivée s'écarte de plus
+        de tolerance du milieu de leurs points d'arrivée. Les rayons se concentrent ainsi près des bords des surfaces
+        et des caustiques, là où le devenir des rayons varie le plus.
+
+        ----------
+        indice : int
+            Indice de la source dans lst_source (objet possédant une méthode rayons_position, voir Ray_simulator.source).
+        N : int
+            Nombre de rayons, régulièrement répartis, du faisceau de départ.
+        tolerance : float
+            Écart admis entre le point d'arrivée d'un rayon et l'interpolation linéaire de ceux de ses voisins.
+        niveaux_max : int
+            Nombre maximal de subdivisions d'un intervalle du faisceau de départ.
+        rayons_max : int
+            Nombre maximal de rayons tracés.
+
+        Retourne le resultat_trace de tous les rayons tracés et la position (entre -1 et 1, voir Ray_simulator.source)
+        du rayon de départ de chaque segment de génération 0, dans l'ordre de ces segments.
+        Avec plusieurs longueurs d'onde, un intervalle est coupé dès que l'une d'elles le demande.
+        """
+        objet = self.lst_source[indice]
+        if not hasattr(objet, "rayons_position"):
+            raise ValueError("source {} does not support adaptive sampling".format(indice))
+        acceleration = intervalles(self.lst_dioptre, self.lst_miroir, self.lst_detecteur)
+        #Nombre de rayons tracés par position (un par longueur d'onde émise)
+        couleurs = 1 if getattr(objet, "longueurs_onde", None) is None else objet.longueurs_onde.size
+
+        def lancer(positions):
+            #Trace les rayons des positions données et renvoie leur point d'arrivée et les surfaces touchées
+            #(une ligne par position, une colonne par longueur d'onde émise à cette position)
+            rayons = objet.rayons_position(positions)
+            resultat = tracer(rayons, self.lst_dioptre, self.lst_miroir, rebonds_max = self.rebonds_max, longueur_min = self.longueur_min, portee = self.portee, acceleration = acceleration, lst_detecteur = self.lst_detecteur)
+            lst_resultat.append(resultat)
+            lst_position.append(np.repeat(positions, couleurs))
+            x, y, parcours = arrivees(resultat, len(rayons))
+            return x.reshape(-1, couleurs), y.reshape(-1, couleurs), parcours.reshape(positions.size, couleurs, -1)
+
+        lst_resultat = []
+        lst_position = []
+        positions = np.linspace(-1, 1, N)
+        x, y, parcours = lancer(positions)
+
+        #Intervalles entre rayons voisins : position, arrivée et surfaces touchées des rayons de gauche (g) et de droite (d)
+        g = {"position": positions[:-1], "x": x[:-1], "y": y[:-1], "parcours": parcours[:-1]}
+        d = {"position": positions[1:], "x": x[1:], "y": y[1:], "parcours": parcours[1:]}
+
+        for niveau in range(niveaux_max):
+            restants = (rayons_max - sum(lst.size for lst in lst_position))//couleurs    #Intervalles encore traçables
+            if not g["position"].size or restants <= 0:
+                break
+            g, d = ({cle: valeurs[:restants] for cle, valeurs in g.items()}, {cle: valeurs[:restants] for cle, valeurs in d.items()})
+            milieu = {"position": (g["position"] + d["position"])/2}
+            milieu["x"], milieu["y"], milieu["parcours"] = lancer(milieu["position"])
+
+            #Les tableaux de surfaces touchées sont complétés à la même longueur (-2 : rayon déjà arrêté)
+            largeur = max(g["parcours"].shape[2], d["parcours"].shape[2], milieu["parcours"].shape[2])
+            for intervalle in [g, d, milieu]:
+                intervalle["parcours"] = np.pad(intervalle["parcours"], ((0, 0), (0, 0), (0, largeur - intervalle["parcours"].shape[2])), constant_values = -2)
+
+            ecart = np.max(np.hypot(milieu["x"] - (g["x"] + d["x"])/2, milieu["y"] - (g["y"] + d["y"])/2), axis = 1)
+            couper = (ecart > tolerance) | np.any(milieu["parcours"] != g["parcours"], axis = (1, 2)) | np.any(milieu["parcours"] != d["parcours"], axis = (1, 2))
+
+            #Chaque intervalle coupé donne deux intervalles : (gauche, milieu) et (milieu, droite)
+            g, d = ({cle: np.concatenate([g[cle][couper], milieu[cle][couper]]) for cle in g},
+                    {cle: np.concatenate([milieu[cle][couper], d[cle][couper]]) for cle in d})
+
+        return concatener(lst_resultat, decaler_parents = True), np.concatenate(lst_position)
+
+    def taches(self, taille = 100000):
+        #Découpage des sources en morceaux (indice de la source, premier rayon, dernier rayon exclu)
+        lst_tache = []
+        for indice, objet in enumerate(self.lst_source):
+            if hasattr(objet, "morceaux"):
+                lst_tache.extend((indice, debut, min(debut + taille, objet.N)) for debut in range(0, objet.N, taille))
+            else:
+                lst_tache.append((indice, None, None))
+        return lst_tache
+
+    def tracer_parallele(self, reducteurs = None, taille = 100000, processus = None):
+        """
+        Trace les sources par morceaux répartis sur plusieurs processus.
+        La scène (et les réducteurs vides servant de modèles) n'est transmise qu'une fois à chaque processus,
+        seuls les indices des rayons à tracer circulent ensuite.
+
+        ----------
+        reducteurs : list
+            Réducteurs possédant les méthodes ajouter(resultat) et fusionner(autre) (voir analyse.statistiques).
+            Si None, les segments de tous les morceaux sont renvoyés.
+        taille : int
+            Nombre de rayons par morceau.
+        processus : int
+            Nombre de processus (par défaut le nombre de cœurs).
+
+        Retourne un resultat_trace (sans réducteurs) ou la liste des réducteurs mis à jour.
+        """
+        import multiprocessing
+
+        modeles = None if reducteurs is None else copy.deepcopy(reducteurs)
+        lst_resultat = []
+
+        with multiprocessing.Pool(processus, initializer = _initialiser_processus, initargs = (self, modeles)) as pool:
+            #imap conserve l'ordre des morceaux : le résultat ne dépend pas du nombre de processus
+            for resultat in pool.imap(_tracer_morceau, self.taches(taille)):
+                if reducteurs is None:
+                    lst_resultat.append(resultat)
+                else:
+                    for reducteur, partiel in zip(reducteurs, resultat):
+                        reducteur.fusionner(partiel)
+
+        return concatener(lst_resultat, decaler_parents = True) if reducteurs is None else reducteurs
+
+
+#Données de chaque processus de calcul, transmises une seule fois par _initialiser_processus
+_processus = {}
+
+
+def _initialiser_processus(objet, modeles):
+    _processus["scene"] = objet
+    _processus["modeles"] = modeles
+    _processus["acceleration"] = intervalles(objet.lst_dioptre, objet.lst_miroir, objet.lst_detecteur)
+
+
+def _tracer_morceau(tache):
+    #Trace un morceau de source dans un processus de calcul et renvoie ses segments ou des réducteurs partiels
+    indice, debut, fin = tache
+    objet = _processus["scene"]
+    source = objet.lst_source[indice]
+    rayons = source.rayons() if debut is None else source.rayons(debut, fin)
+    resultat = tracer(rayons, objet.lst_dioptre, objet.lst_miroir, rebonds_max = objet.rebonds_max, longueur_min = objet.longueur_min, portee = objet.portee, acceleration = _processus["acceleration"], lst_detecteur = objet.lst_detecteur)
+
+    if _processus["modeles"] is None:
+        return resultat
+    reducteurs = copy.deepcopy(_processus["modeles"])
+    for reducteur in reducteurs:
+        reducteur.ajouter(resultat)
+    return reducteurs
+
+
+def tracer(rayons, lst_dioptre, lst_miroir, rebonds_max = REBONDS_MAX, longueur_min = LONGUEUR_MIN, portee = 20, acceleration = None, stats = None, reserve = None, lst_detecteur = ()):
+    """
+    Propage un faisceau génération par génération : à chaque étape tous les rayons vivants avancent
+    jusqu'à leur prochain obstacle, puis les rayons réfléchis/réfractés forment le faisceau suivant.
+    Aucune récursion, le nombre d'interactions est borné par rebonds_max (utile pour les cavités entre miroirs).
+    La traversée d'un détecteur transparent ajoute une étape mais ni génération ni rebond : le segment qui suit
+    est de la même génération que celui qui arrive sur le détecteur.
+
+    ----------
+    rayons : faisceau
+        Rayons de départ.
+    lst_dioptre : list
+        Interfaces (sous_dioptre) de la scène.
+    lst_miroir : list
+        Miroirs de la scène.
+    rebonds_max : int
+        Nombre maximal d'interactions suivies (réflexions et réfractions), les rayons créés au-delà ne sont pas tracés.
+    longueur_min : float
+        Distance en dessous de laquelle un point d'impact est ignoré.
+    portee : float
+        Distance maximale parcourue selon l'axe des abscisses par un rayon qui ne rencontre rien.
+    acceleration : intervalles
+        Structure d'accélération des surfaces, à fournir pour la réutiliser entre plusieurs tracés.
+    stats : statistiques_trace
+        Compteurs et durées à mettre à jour (aucune mesure si None).
+    reserve : reserve_segments
+        Réserve dans laquelle écrire les segments, à fournir pour la partager entre plusieurs tracés.
+    lst_detecteur : list
+        Détecteurs de la scène : les rayons qui les touchent s'y arrêtent, sauf pour un détecteur transparent.
+
+    Retourne un resultat_trace contenant tous les segments parcourus.
+    """
+    if stats is not None:
+        stats.demarrer()
+    if acceleration is None:
+        acceleration = intervalles(lst_dioptre, lst_miroir, lst_detecteur)    #Construite une seule fois pour toutes les générations
+    if stats is not None:
+        stats.top("preparation")
+
+    if reserve is None:
+        reserve = reserve_segments(2*len(rayons))
+    premier = reserve.nombre    #Premier segment de ce tracé dans la réserve
+    while len(rayons):
+        if stats is not None:
+            for numero, nombre in enumerate(np.bincount(rayons.generation)):
+                if nombre:
+                    stats.generation(numero, int(nombre))
+        x_fin, y_fin, surface, enfants = rayons.interaction(lst_dioptre, lst_miroir, portee = portee, longueur_min = longueur_min, acceleration = acceleration, stats = stats, lst_detecteur = lst_detecteur)
+        debut = reserve.nombre - premier    #Indice dans le résultat du premier segment de cette génération
+        reserve.ajouter_segments(rayons.x, rayons.y, x_fin, y_fin, rayons.teta, rayons.generation, surface, rayons.parent, rayons.longueur_onde)
+
+        enfants.parent += debut     #Indice du rayon d'origine dans le faisceau -> indice de son segment dans le résultat
+        #Les rayons au-delà de rebonds_max interactions ne sont pas tracés (les traversées de détecteurs ne comptent pas :
+        #un rayon droit ne touche chaque détecteur qu'une fois, le tracé se termine donc toujours)
+        rayons = enfants if enfants.generation.max(initial = 0) <= rebonds_max else enfants[enfants.generation <= rebonds_max]
+
+    return reserve.resultat(premier)
+
+
+def arrivees(resultat, N):
+    """
+    Devenir de chacun des N rayons de départ d'un tracé (les N premiers segments de resultat, voir tracer).
+
+    Retourne l'abscisse et l'ordonnée de fin du dernier segment de chaque rayon et un tableau (N, étapes)
+    des surfaces touchées successivement, détecteurs transparents compris (-1 : aucune, -2 : rayon déjà arrêté).
+    """
+    #Rayon de départ et rang dans le trajet de chaque segment, en remontant les parents
+    origine = np.arange(len(resultat))
+    etape = np.zeros(len(resultat), dtype = np.int64)
+    parent = resultat.parent.copy()
+    actifs = np.flatnonzero(parent >= 0)
+    while actifs.size:
+        origine[actifs] = parent[actifs]
+        etape[actifs] += 1
+        parent[actifs] = resultat.parent[parent[actifs]]
+        actifs = actifs[parent[actifs] >= 0]
+
+    dernier = np.zeros(N, dtype = np.int64)
+    np.maximum.at(dernier, origine, np.arange(len(resultat)))
+    parcours = np.full((N, int(etape.max(initial = 0)) + 1), -2, dtype = np.int64)
+    parcours[origine, etape] = resultat.surface
+    return resultat.x1[dernier], resultat.y1[dernier], parcours
+
+
+def intersection_cercle(f, c, r, gauche):
+    #Résolution de l'équation d'intersection entre les droites du faisceau et le cercle de centre (c, 0) et de rayon r
+    #Les rayons sans solution reçoivent NaN, toutes les comparaisons qui suivent sont alors fausses
+    k = f.y - f.pente*f.x     #Ordonnée à l'origine des droites
+    A = 1 + f.pente**2
+    B = 2*f.pente*k - 2*c
+    C = c**2 + k**2 - r**2
+
+    delta = (B**2)-(4*A*C)
+    with np.errstate(invalid = "ignore"):
+        racine = np.sqrt(delta)
+
+    #On choisi la solution de gauche ou de droite du cercle
+    if gauche:
+        X = (-B - racine)/(2*A)
+    else:
+        X = (-B + racine)/(2*A)
+    Y = f.pente*X + k
+    return X, Y
+
+
+def intersection_miroir(f, miroir):
+    #Si r>0, la solution est sur la droite du "cercle", sinon elle est sur la gauche du "cercle"
+    X, Y = intersection_cercle(f, miroir.x - miroir.r, miroir.r, miroir.r < 0)
+
+    #On vérifie que la solution est bien sur le miroir (bornes calculées une fois par le miroir) et que le rayon arrive du bon côté
+    cote = np.where(f.direction, f.x < miroir.x, f.x > miroir.x)
+    valide = (Y < miroir.max) & (Y > miroir.min) & cote & (X >= miroir.xmin - TOLERANCE) & (X <= miroir.xmax + TOLERANCE)
+    return X, Y, valide
+
+
+def intersection_dioptre(f, dioptre):
+    X, Y = intersection_cercle(f, dioptre.c, dioptre.r, dioptre.side)
+
+    #On vérifie que la solution est bien sur l'interface
+    valide = (Y > dioptre.min) & (Y < dioptre.max) & (X >= dioptre.xmin - TOLERANCE) & (X <= dioptre.xmax + TOLERANCE)
+    return X, Y, valide
+
+
+def intersection_detecteur(f, detecteur):
+    #Intersection des droites du faisceau et du segment [A, B] du détecteur : point A + s*(B - A) avec 0 <= s <= 1
+    dx, dy = detecteur.xb - detecteur.xa, detecteur.yb - detecteur.ya
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        s = (f.y + f.pente*(detecteur.xa - f.x) - detecteur.ya)/(dy - f.pente*dx)    #Rayon parallèle au détecteur : inf ou NaN
+    X = detecteur.xa + s*dx
+    Y = detecteur.ya + s*dy
+    return X, Y, (s >= 0) & (s <= 1)
+
+
+def traversee(f, detecteur):
+    #Rayons après un détecteur : inchangés s'il est transparent, arrêtés (angle NaN) sinon
+    if detecteur.transparent:
+        return f.teta.copy(), f.direction
+    return np.full(len(f), np.nan), f.direction
+
+
+def reflexion(f, miroir, X, Y):
+    #Angle des rayons réfléchis par un miroir aux points (X, Y)
+    teta_rayon = np.arcsin(Y/miroir.r)     #Angle de la normale
+    teta = -np.pi + 2*teta_rayon - f.teta
+    teta = (teta + np.pi) % (2*np.pi) - np.pi  #Angle ramené entre -pi et pi
+
+    return teta, np.abs(teta) <= np.pi/2
+
+
+def refraction(f, dioptre, X, Y):
+    #Angle des rayons réfractés par une interface aux points (X, Y)
+    if dioptre.side:
+        teta_rayon = np.pi - np.arctan(Y/(dioptre.c - X))
+    else:
+        teta_rayon = np.arctan(Y/(X - dioptre.c))
+
+    beta = np.pi - teta_rayon + f.teta     #Angle entre la normale et le rayon incident
+    n_left, n_right = indice(dioptre.n_left, f.longueur_onde), indice(dioptre.n_right, f.longueur_onde)  #Un indice par rayon pour un matériau dispersif
+    with np.errstate(invalid = "ignore"):
+        alpha = np.arcsin((np.sin(beta)*n_left)/n_right)   #Angle entre la normale et le rayon réfracté
+
+    teta = np.where(f.direction == dioptre.side, teta_rayon + alpha - np.pi, teta_rayon - alpha)
+    return teta, f.direction
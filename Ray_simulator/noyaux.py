@@ -0,0 +1,143 @@
+"""
+Noyau de calcul compilé avec Numba (facultatif) pour moteur.faisceau.interaction.
+Une seule boucle compilée parcourt les rayons, puis pour chacun les surfaces : test de la boîte englobante,
+intersection, conservation du point d'impact le plus proche et calcul de l'angle réfléchi/réfracté.
+Les calculs sont ceux des fonctions NumPy de moteur.py, sans tableaux intermédiaires ni sous-faisceaux.
+
+Ce module n'est importé par moteur que si Numba est installé et lors du premier tracé qui l'utilise
+(voir moteur.choisir_noyau), le chargement de Numba étant long.
+"""
+import numba
+import numpy as np
+
+#error_model = "numpy" : une division par zéro donne inf/NaN comme avec NumPy au lieu de lever une exception
+compiler = numba.njit(cache = True, error_model = "numpy")
+
+
+@compiler
+def _intersection_cercle(x, y, pente, c, r, gauche):
+    #Point d'intersection d'une droite et du cercle de centre (c, 0) et de rayon r (NaN si aucun)
+    k = y - pente*x
+    A = 1 + pente**2
+    B = 2*pente*k - 2*c
+    C = c**2 + k**2 - r**2
+
+    delta = (B**2)-(4*A*C)
+    if delta < 0:
+        return np.nan, np.nan
+    racine = np.sqrt(delta)
+
+    if gauche:
+        X = (-B - racine)/(2*A)
+    else:
+        X = (-B + racine)/(2*A)
+    return X, pente*X + k
+
+
+@compiler
+def _intersection_segment(x, y, pente, xa, ya, xb, yb):
+    #Point d'intersection d'une droite et du segment [A, B] (voir moteur.intersection_detecteur) et validité
+    s = (y + pente*(xa - x) - ya)/((yb - ya) - pente*(xb - xa))
+    return xa + s*(xb - xa), ya + s*(yb - ya), (s >= 0) and (s <= 1)
+
+
+@compiler
+def interaction(x, y, teta, pente, direction, droite, gauche, boites, cercles, nb_dioptre, premier_detecteur, portee, longueur_min, tolerance):
+    """
+    Propage chaque rayon jusqu'à son premier obstacle (voir moteur.faisceau.interaction).
+    Chaque rayon parcourt les surfaces dans l'ordre de la structure d'accélération et s'arrête dès que
+    les surfaces restantes commencent après le point d'impact déjà trouvé.
+
+    ----------
+    x, y, teta, pente, direction : array
+        Rayons du faisceau.
+    droite, gauche : array d'int
+        Ordres de parcours des surfaces pour les rayons allant vers la droite et vers la gauche (voir moteur.intervalles).
+    boites : array (n, 4)
+        Boîtes englobantes des surfaces (xmin, xmax, ymin, ymax).
+    cercles : array (n, 6)
+        Centre, rayon, solution de gauche (0 ou 1), sommet (miroir), n_left et n_right (dioptre) de chaque surface,
+        extrémités et transparence pour un détecteur.
+    nb_dioptre, premier_detecteur : int
+        Les nb_dioptre premières surfaces sont des dioptres, les suivantes des miroirs puis des détecteurs à partir de premier_detecteur.
+
+    Retourne l'abscisse de fin, l'indice de la surface touchée (-1 si aucune), l'angle et la direction du rayon créé
+    pour chaque rayon, ainsi que le nombre de tests d'intersection, de tests évités par les boîtes englobantes et de solutions rejetées.
+    """
+    N = x.size
+    x_fin = np.empty(N)
+    surface = np.full(N, -1)
+    teta_enfant = np.full(N, np.nan)
+    direction_enfant = direction.copy()
+    tests = 0
+    evites = 0
+    rejetees = 0
+
+    for j in range(N):
+        x0 = x[j]
+        y0 = y[j]
+        sens = 1.0 if direction[j] else -1.0
+        distance = portee
+        x_fin[j] = x0 + sens*portee
+        ordre = droite if direction[j] else gauche
+
+        for i in ordre:
+            xmin, xmax, ymin, ymax = boites[i, 0], boites[i, 1], boites[i, 2], boites[i, 3]
+            x1 = x_fin[j]
+            bas, haut = (x0, x1) if direction[j] else (x1, x0)
+
+            #Surfaces triées : si celle-ci est hors de portée, les suivantes aussi
+            if (direction[j] and haut < xmin - tolerance) or (not direction[j] and bas > xmax + tolerance):
+                break
+
+            #Boîte englobante
+            y1 = y0 + pente[j]*(x1 - x0)
+            if not ((haut >= xmin - tolerance) and (bas <= xmax + tolerance) and (max(y0, y1) >= ymin) and (min(y0, y1) <= ymax)):
+                evites += 1
+                continue
+            tests += 1
+
+            centre, r, solution_gauche = cercles[i, 0], cercles[i, 1], cercles[i, 2] > 0
+            if i >= premier_detecteur:
+                X, Y, valide = _intersection_segment(x0, y0, pente[j], cercles[i, 0], cercles[i, 1], cercles[i, 2], cercles[i, 3])
+            else:
+                X, Y = _intersection_cercle(x0, y0, pente[j], centre, r, solution_gauche)
+                valide = (Y > ymin) and (Y < ymax) and (X >= xmin - tolerance) and (X <= xmax + tolerance)
+            if i >= nb_dioptre and i < premier_detecteur:     #Un miroir n'est touché que du côté d'où arrive le rayon
+                valide = valide and (x0 < cercles[i, 3] if direction[j] else x0 > cercles[i, 3])
+            if not valide:
+                rejetees += 1
+                continue
+
+            d = (X - x0)*sens
+            if not (d > longueur_min and d < distance):
+                continue
+            distance = d
+            surface[j] = i
+            x_fin[j] = X
+
+            if i < nb_dioptre:
+                #Réfraction (voir moteur.refraction)
+                if solution_gauche:
+                    teta_normale = np.pi - np.arctan(Y/(centre - X))
+                else:
+                    teta_normale = np.arctan(Y/(X - centre))
+                beta = np.pi - teta_normale + teta[j]
+                alpha = np.arcsin((np.sin(beta)*cercles[i, 4])/cercles[i, 5])   #NaN en cas de réflexion totale
+                if direction[j] == solution_gauche:
+                    teta_enfant[j] = teta_normale + alpha - np.pi
+                else:
+                    teta_enfant[j] = teta_normale - alpha
+                direction_enfant[j] = direction[j]
+            elif i >= premier_detecteur:
+                #Détecteur (voir moteur.traversee) : rayon inchangé s'il est transparent, arrêté sinon
+                teta_enfant[j] = teta[j] if cercles[i, 4] > 0 else np.nan
+                direction_enfant[j] = direction[j]
+            else:
+                #Réflexion (voir moteur.reflexion)
+                angle = -np.pi + 2*np.arcsin(Y/r) - teta[j]
+                angle = (angle + np.pi) % (2*np.pi) - np.pi
+                teta_enfant[j] = angle
+                direction_enfant[j] = abs(angle) <= np.pi/2
+
+    return x_fin, surface, teta_enfant, direction_enfant, tests, evites, rejetees
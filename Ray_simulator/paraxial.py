@@ -0,0 +1,185 @@
+"""
+Optique paraxiale (matrices de transfert ABCD) des systèmes de lentilles et de miroirs de Ray_simulator.py.
+
+Près de l'axe, chaque surface est remplacée par une matrice 2x2 agissant sur (y, u), hauteur et pente dy/dx du rayon
+dans le repère de la scène, calculée directement à partir des paramètres des sous_dioptre (centre, rayon, côté,
+n_left/n_right) et des miroirs (x, r). Les surfaces sont prises dans l'ordre où un rayon sur l'axe les rencontre,
+les miroirs renversant le sens de propagation. Le produit des matrices donne les points cardinaux et la position
+des images sans tracer de rayons, ce qui permet de trier des géométries avant un tracé exact (voir balayage.py).
+
+Dans le tracé exact (moteur.refraction), un rayon allant vers la gauche est réfracté avec le rapport n_left/n_right,
+comme un rayon allant vers la droite ; ici l'indice du milieu d'où vient le rayon est utilisé. Les deux calculs
+diffèrent donc pour un rayon qui retraverse une lentille après un miroir.
+
+Avec des matériaux dispersifs (materiaux.py), la matrice est calculée pour une seule longueur d'onde : on construit
+un systeme_paraxial par longueur d'onde pour comparer leurs foyers (aberration chromatique).
+"""
+import numpy as np
+
+from materiaux import LONGUEUR_ONDE, indice
+from moteur import REBONDS_MAX, TOLERANCE
+
+
+def propagation(distance):
+    #Déplacement de distance selon l'axe des abscisses (négative pour un rayon allant vers la gauche)
+    return np.array([[1., distance], [0., 1.]])
+
+
+def refraction(R, n1, n2):
+    #Interface de rayon de courbure R (centre - sommet) entre le milieu d'indice n1 d'où vient le rayon et celui d'indice n2
+    return np.array([[1., 0.], [(n1/n2 - 1)/R, n1/n2]])
+
+
+def reflexion(R):
+    #Miroir de rayon de courbure R (centre - sommet) : la pente est symétrisée par rapport à la normale
+    return np.array([[1., 0.], [-2/R, -1.]])
+
+
+def sommet(surface):
+    #Abscisse du point de la surface situé sur l'axe et rayon de courbure (centre - sommet)
+    if hasattr(surface, "side"):    #sous_dioptre
+        return (surface.c - surface.r, surface.r) if surface.side else (surface.c + surface.r, -surface.r)
+    return surface.x, -surface.r    #miroir
+
+
+def sequence(lst_dioptre, lst_miroir, x_entree = -np.inf, rebonds_max = REBONDS_MAX):
+    """
+    Surfaces rencontrées par un rayon partant de x_entree vers la droite sur l'axe, dans l'ordre.
+
+    ----------
+    lst_dioptre : list
+        Interfaces (sous_dioptre) de la scène.
+    lst_miroir : list
+        Miroirs de la scène.
+    x_entree : float
+        Abscisse de départ du rayon.
+    rebonds_max : int
+        Nombre maximal de surfaces rencontrées (cavités entre miroirs).
+
+    Retourne la liste des (indice dans lst_dioptre + lst_miroir, abscisse du sommet, sens de propagation avant la surface).
+    """
+    surfaces = list(lst_dioptre) + list(lst_miroir)
+    sommets = np.array([sommet(objet)[0] for objet in surfaces], dtype = float)
+    x, sens = x_entree, 1
+    lst_etape = []
+    for rebond in range(rebonds_max):
+        #Prochain sommet strictement devant le rayon
+        distance = (sommets - x)*sens
+        devant = np.flatnonzero(distance > TOLERANCE)
+        if not devant.size:
+            break
+        i = int(devant[np.argmin(distance[devant])])
+        lst_etape.append((i, sommets[i], sens))
+        x = sommets[i]
+        if i >= len(lst_dioptre):
+            sens = -sens
+    return lst_etape
+
+
+class systeme_paraxial:
+    """
+    Matrice de transfert d'un système de lentilles et de miroirs, entre le plan d'entrée (sommet de la première
+    surface rencontrée) et le plan de sortie (sommet de la dernière), et points cardinaux qui en découlent.
+    Toutes les abscisses sont celles de la scène.
+
+    ----------
+    lst_dioptre : list
+        Interfaces (sous_dioptre) du système.
+    lst_miroir : list
+        Miroirs du système.
+    x_entree : float
+        Abscisse à partir de laquelle les surfaces sont parcourues vers la droite (par défaut toutes les surfaces).
+    rebonds_max : int
+        Nombre maximal de surfaces parcourues.
+    longueur_onde : float
+        Longueur d'onde (µm) pour laquelle les indices des matériaux sont évalués.
+    """
+    def __init__(self, lst_dioptre, lst_miroir, x_entree = -np.inf, rebonds_max = REBONDS_MAX, longueur_onde = LONGUEUR_ONDE):
+        self.longueur_onde = longueur_onde
+        self.lst_surface = list(lst_dioptre) + list(lst_miroir)
+        self.etapes = sequence(lst_dioptre, lst_miroir, x_entree, rebonds_max)
+        if not self.etapes:
+            raise ValueError("no surface on the optical axis")
+
+        self.x_entree = self.etapes[0][1]
+        self.x_sortie = self.etapes[-1][1]
+
+        #Produit des matrices, en gardant la matrice cumulée jusqu'au sommet de chaque surface (voir rayon)
+        self.matrices = []
+        matrice = np.eye(2)
+        x = self.x_entree
+        for i, x_sommet, sens in self.etapes:
+            objet = self.lst_surface[i]
+            matrice = propagation(x_sommet - x) @ matrice
+            self.matrices.append(matrice)
+            if i < len(lst_dioptre):
+                #Le rayon passe du milieu d'où il vient à celui de l'autre côté de l'interface
+                n_left, n_right = float(indice(objet.n_left, longueur_onde)), float(indice(objet.n_right, longueur_onde))
+                n1, n2 = (n_left, n_right) if sens > 0 else (n_right, n_left)
+                matrice = refraction(sommet(objet)[1], n1, n2) @ matrice
+            else:
+                matrice = reflexion(sommet(objet)[1]) @ matrice
+            x = x_sommet
+        self.matrice = matrice
+
+        #Sens de propagation après la dernière surface
+        dernier, sens = self.etapes[-1][0], self.etapes[-1][2]
+        self.sens = sens if dernier < len(lst_dioptre) else -sens
+
+    def cardinaux(self):
+        """
+        Points cardinaux du système.
+
+        Retourne un dictionnaire contenant les abscisses des foyers objet et image (F, F_image), des plans principaux
+        (H, H_image) et des points nodaux (N, N_image), et la distance focale image (mesurée dans le sens de
+        propagation en sortie, positive pour un système convergent). Un système afocal n'a pas de foyers (valeurs inf).
+        """
+        (A, B), (C, D) = self.matrice
+        determinant = A*D - B*C
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            C = np.float64(C)
+            return {"F": self.x_entree + D/C,
+                    "H": self.x_entree + (D - determinant)/C,
+                    "N": self.x_entree + (D - 1)/C,
+                    "F_image": self.x_sortie - A/C,
+                    "H_image": self.x_sortie + (1 - A)/C,
+                    "N_image": self.x_sortie + (determinant - A)/C,
+                    "focale": -self.sens/C}
+
+    def image(self, x_objet):
+        """
+        Image d'un point de l'axe situé en x_objet, avant le plan d'entrée.
+
+        Retourne l'abscisse de l'image (réelle ou virtuelle) et le grandissement transversal.
+        """
+        (A, B), (C, D) = self.matrice @ propagation(self.x_entree - x_objet)
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            distance = -np.float64(B)/D     #Depuis le plan de sortie, où la hauteur ne dépend plus de la pente
+        return self.x_sortie + distance, A + distance*C
+
+    def rayon(self, y, u = 0., x = None, longueur = 20.):
+        """
+        Trajet paraxial d'un rayon, de x (par défaut le plan d'entrée) jusqu'à longueur après le plan de sortie.
+        Les surfaces sont assimilées à leur plan tangent au sommet.
+
+        ----------
+        y, u : float ou array
+            Hauteur et pente du rayon en x (plusieurs rayons avec des tableaux).
+        x : float
+            Abscisse de départ du rayon, avant le plan d'entrée.
+
+        Retourne les abscisses (liste) et les ordonnées (tableau, une ligne par abscisse) des points du trajet.
+        """
+        x = self.x_entree if x is None else x
+        depart = np.array(np.broadcast_arrays(np.asarray(y, dtype = float), np.asarray(u, dtype = float)))
+        entree = propagation(self.x_entree - x) @ depart.reshape(2, -1)     #Hauteur et pente au plan d'entrée
+
+        abscisses = [x] + [x_sommet for i, x_sommet, sens in self.etapes] + [self.x_sortie + self.sens*longueur]
+        hauteurs = [depart[0].reshape(-1)] + [(matrice @ entree)[0] for matrice in self.matrices]
+        hauteurs.append((propagation(self.sens*longueur) @ self.matrice @ entree)[0])
+        return abscisses, np.array(hauteurs).reshape((len(abscisses),) + depart[0].shape)
+
+
+def depuis_scene(objet, x_entree = -np.inf, longueur_onde = LONGUEUR_ONDE):
+    #Système paraxial des lentilles et miroirs d'une moteur.scene (les détecteurs sont ignorés)
+    return systeme_paraxial(objet.lst_dioptre, objet.lst_miroir, x_entree, objet.rebonds_max, longueur_onde)
@@ -0,0 +1,348 @@
+import numpy as np
+
+ECHANTILLONS_MAX = 2**22    #Nombre maximal de points d'échantillonnage des segments traités en une passe par densite.ajouter
+ECHELLES = ["log", "lineaire"]    #Correspondances tonales de dessiner_densite
+
+
+def dessiner(ax, resultat, color = "k", color_enfants = "C1", alpha = 1, animated = False, stats = None):
+    """
+    Trace les segments d'un resultat_trace avec une seule LineCollection par couleur.
+    Chaque segment n'a que ses deux extrémités, quel que soit le nombre de rayons un seul artiste est créé par couleur.
+
+    ----------
+    ax : matplotlib axes
+        Axes sur lesquels tracer les rayons.
+    resultat : resultat_trace
+        Segments à tracer (voir moteur.scene).
+    color : str
+        Couleur des rayons issus des sources.
+    color_enfants : str
+        Couleur des rayons réfléchis/réfractés.
+    alpha : float
+        Transparence des rayons.
+    animated : bool
+        Artistes exclus du tracé normal de la figure, pour être redessinés par blitting (voir actualiser).
+    stats : moteur.statistiques_trace
+        Mesures du tracé auxquelles ajouter la durée de création des artistes (étape rendu).
+
+    Retourne la liste des deux LineCollection ajoutées aux axes (rayons des sources puis rayons réfléchis/réfractés).
+    """
+    from matplotlib.collections import LineCollection  #matplotlib n'est chargé que pour le rendu
+
+    if stats is not None:
+        stats.demarrer()
+    collections = [ax.add_collection(LineCollection([], colors = couleur, alpha = alpha, animated = animated)) for couleur in [color, color_enfants]]
+    actualiser(collections, resultat)
+
+    if len(resultat):
+        ax.update_datalim(resultat.segments().reshape(-1, 2))
+        ax.autoscale_view()
+    if stats is not None:
+        stats.top("rendu")
+    return collections
+
+
+def couleur_longueur_onde(longueur_onde):
+    #Couleur RVB approchée d'une longueur d'onde visible (µm), grise en dehors du visible
+    l = longueur_onde*1000
+    if 380 <= l < 440:
+        rvb = ((440 - l)/60, 0., 1.)
+    elif 440 <= l < 490:
+        rvb = (0., (l - 440)/50, 1.)
+    elif 490 <= l < 510:
+        rvb = (0., 1., (510 - l)/20)
+    elif 510 <= l < 580:
+        rvb = ((l - 510)/70, 1., 0.)
+    elif 580 <= l < 645:
+        rvb = (1., (645 - l)/65, 0.)
+    elif 645 <= l <= 780:
+        rvb = (1., 0., 0.)
+    else:
+        return (0.5, 0.5, 0.5)
+    return tuple(0.85*valeur for valeur in rvb)    #Légèrement assombrie pour rester visible sur fond blanc
+
+
+def dessiner_spectre(ax, resultat, alpha = 1, animated = False, stats = None):
+    """
+    Trace les segments d'un resultat_trace avec une LineCollection par longueur d'onde, de la couleur de celle-ci.
+
+    ----------
+    ax : matplotlib axes
+        Axes sur lesquels tracer les rayons.
+    resultat : resultat_trace
+        Segments à tracer (voir moteur.scene).
+    alpha : float
+        Transparence des rayons.
+    animated : bool
+        Artistes exclus du tracé normal de la figure (voir dessiner).
+    stats : moteur.statistiques_trace
+        Mesures du tracé auxquelles ajouter la durée de création des artistes (étape rendu).
+
+    Retourne la liste des LineCollection ajoutées aux axes, dans l'ordre des longueurs d'onde croissantes.
+    """
+    from matplotlib.collections import LineCollection
+
+    if stats is not None:
+        stats.demarrer()
+    segments = resultat.segments()
+    collections = []
+    for longueur_onde in np.unique(resultat.longueur_onde):
+        selection = resultat.longueur_onde == longueur_onde
+        collections.append(ax.add_collection(LineCollection(segments[selection], colors = [couleur_longueur_onde(longueur_onde)],
+                                                            alpha = alpha, animated = animated, label = "{:.0f} nm".format(longueur_onde*1000))))
+    if len(resultat):
+        ax.update_datalim(segments.reshape(-1, 2))
+        ax.autoscale_view()
+    if stats is not None:
+        stats.top("rendu")
+    return collections
+
+
+def actualiser(collections, resultat):
+    #Remplace les segments des collections créées par dessiner, sans créer de nouvel artiste
+    segments = resultat.segments()
+    source = resultat.generation == 0
+
+    collections[0].set_segments(segments[source])
+    collections[1].set_segments(segments[~source])
+
+
+def _phase(x0, y0, x1, y1):
+    #Nombre pseudo-aléatoire entre 0 et 1 calculé à partir des extrémités de chaque segment (mélange splitmix64) :
+    #un segment a le même décalage quel que soit le morceau ou le processus qui le trace (voir densite.fusionner)
+    cle = np.zeros(np.size(x0), dtype = np.uint64)
+    for coordonnee in [x0, y0, x1, y1]:
+        cle = (cle ^ np.ascontiguousarray(coordonnee, dtype = np.float64).view(np.uint64))*np.uint64(0x9e3779b97f4a7c15)
+        cle ^= cle >> np.uint64(30)
+        cle *= np.uint64(0xbf58476d1ce4e5b9)
+        cle ^= cle >> np.uint64(27)
+        cle *= np.uint64(0x94d049bb133111eb)
+        cle ^= cle >> np.uint64(31)
+    return (cle >> np.uint64(11))*2.0**-53
+
+
+class densite:
+    """
+    Image de densité des rayons : des points répartis régulièrement le long des segments ajoutent au pixel qui les
+    contient la longueur de segment qu'ils représentent. Un pixel contient ainsi la longueur de rayon qui le traverse,
+    ce qui fait apparaître caustiques et foyers.
+    Le nombre de points par appel de ajouter est borné par echantillons points par pixel : au-delà, l'écart entre
+    deux points dépasse un pixel (avec un décalage pseudo-aléatoire par segment, la densité reste exacte en moyenne).
+    Le coût ne dépend donc que du nombre de pixels, pas du nombre de rayons.
+    Utilisable comme réducteur de moteur.scene.tracer_flux et tracer_parallele (méthodes ajouter et fusionner).
+
+    ----------
+    xlim, ylim : tuple
+        Étendue de l'image selon les abscisses et les ordonnées.
+    resolution : tuple
+        Nombre de pixels de l'image (largeur, hauteur).
+    echantillons : float
+        Nombre moyen de points d'échantillonnage par pixel de l'image pour chaque appel de ajouter.
+    """
+    def __init__(self, xlim, ylim, resolution = (800, 600), echantillons = 32):
+        self.xlim = (float(xlim[0]), float(xlim[1]))
+        self.ylim = (float(ylim[0]), float(ylim[1]))
+        self.largeur, self.hauteur = int(resolution[0]), int(resolution[1])
+        self.echantillons = echantillons
+        self.image = np.zeros((self.hauteur, self.largeur))    #Ligne = ordonnée (origine en bas), colonne = abscisse
+
+    def pixels(self, x, y):
+        #Coordonnées (en pixels, non arrondies) des points (x, y)
+        u = (x - self.xlim[0])/(self.xlim[1] - self.xlim[0])*self.largeur
+        v = (y - self.ylim[0])/(self.ylim[1] - self.ylim[0])*self.hauteur
+        return u, v
+
+    def ajouter(self, resultat):
+        u0, v0 = self.pixels(resultat.x0, resultat.y0)
+        u1, v1 = self.pixels(resultat.x1, resultat.y1)
+        du, dv = u1 - u0, v1 - v0
+
+        #Partie [t0, t1] de chaque segment située dans l'image (découpage par les quatre bords)
+        t0 = np.zeros(len(resultat))
+        t1 = np.ones(len(resultat))
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            for p, d, taille in [(u0, du, self.largeur), (v0, dv, self.hauteur)]:
+                a, b = -p/d, (taille - p)/d
+                dedans = (p >= 0) & (p <= taille)   #Segment parallèle au bord : entièrement dedans ou dehors
+                t0 = np.where(d == 0, np.where(dedans, t0, 1), np.maximum(t0, np.minimum(a, b)))
+                t1 = np.where(d == 0, np.where(dedans, t1, 0), np.minimum(t1, np.maximum(a, b)))
+        visibles = np.flatnonzero(t1 > t0)
+        if not visibles.size:
+            return
+
+        u0, v0, du, dv = u0[visibles], v0[visibles], du[visibles], dv[visibles]
+        t0, etendue = t0[visibles], t1[visibles] - t0[visibles]
+        longueur = np.hypot(du, dv)*etendue     #Longueur visible de chaque segment, en pixels
+
+        #Un point tous les pas pixels le long de chaque segment, le premier à une distance aléatoire (entre 0 et pas) de son début
+        pas = max(1., longueur.sum()/(self.echantillons*self.image.size))
+        phase = _phase(resultat.x0[visibles], resultat.y0[visibles], resultat.x1[visibles], resultat.y1[visibles])
+        nombre = np.maximum(np.ceil(longueur/pas - phase), 0).astype(np.int64)
+
+        #Les segments sont traités par blocs pour borner la mémoire des points d'échantillonnage
+        cumul = np.cumsum(nombre)
+        debut = 0
+        while debut < visibles.size:
+            avant = cumul[debut - 1] if debut else 0
+            fin = max(int(np.searchsorted(cumul, avant + ECHANTILLONS_MAX, side = "right")), debut + 1)
+            bloc = slice(debut, fin)
+            indices = np.repeat(np.arange(fin - debut), nombre[bloc])
+            rang = np.arange(indices.size) - np.repeat(cumul[bloc] - nombre[bloc] - avant, nombre[bloc])
+
+            with np.errstate(divide = "ignore", invalid = "ignore"):
+                t = t0[bloc][indices] + (rang + phase[bloc][indices])*pas/longueur[bloc][indices]*etendue[bloc][indices]
+            colonne = np.clip((u0[bloc][indices] + t*du[bloc][indices]).astype(np.int64), 0, self.largeur - 1)
+            ligne = np.clip((v0[bloc][indices] + t*dv[bloc][indices]).astype(np.int64), 0, self.hauteur - 1)
+            self.image += pas*np.bincount(ligne*self.largeur + colonne, minlength = self.image.size).reshape(self.image.shape)
+            debut = fin
+
+    def fusionner(self, autre):
+        self.image += autre.image
+
+
+def tonalite(image, echelle = "log"):
+    #Valeurs de l'image ramenées entre 0 et 1, linéairement ou logarithmiquement (fortes densités compressées)
+    if echelle not in ECHELLES:
+        raise ValueError("{} is not a valid scale".format(echelle))
+    maximum = image.max() if image.size else 0
+    if maximum <= 0:
+        return np.zeros_like(image)
+    if echelle == "log":
+        return np.log1p(image)/np.log1p(maximum)
+    return image/maximum
+
+
+def dessiner_densite(ax, resultat, resolution = (800, 600), echelle = "log", cmap = "inferno", xlim = None, ylim = None, stats = None, **kwargs):
+    """
+    Affiche la densité des rayons sous forme d'une seule image, à la place d'un segment par rayon (voir dessiner).
+
+    ----------
+    ax : matplotlib axes
+        Axes sur lesquels afficher l'image.
+    resultat : resultat_trace ou densite
+        Segments à accumuler, ou image déjà accumulée (par exemple par moteur.scene.tracer_flux).
+    resolution : tuple
+        Nombre de pixels (largeur, hauteur) de l'image si resultat est un resultat_trace.
+    echelle : str
+        "log" ou "lineaire" (voir tonalite).
+    cmap : str
+        Carte de couleurs de l'image.
+    xlim, ylim : tuple
+        Étendue de l'image si resultat est un resultat_trace (par défaut les limites actuelles des axes).
+    stats : moteur.statistiques_trace
+        Mesures du tracé auxquelles ajouter la durée d'accumulation et de création de l'image (étape rendu).
+    kwargs :
+        Paramètres transmis à ax.imshow.
+
+    Retourne l'AxesImage ajoutée aux axes.
+    """
+    if stats is not None:
+        stats.demarrer()
+    if not isinstance(resultat, densite):
+        image = densite(xlim if xlim is not None else ax.get_xlim(), ylim if ylim is not None else ax.get_ylim(), resolution)
+        image.ajouter(resultat)
+        resultat = image
+
+    #L'image prend le rapport d'aspect déjà choisi pour les axes, sauf s'il est précisé dans kwargs
+    parametres = {"origin": "lower", "cmap": cmap, "aspect": ax.get_aspect(), "interpolation": "nearest"}
+    parametres.update(kwargs)
+    artiste = ax.imshow(tonalite(resultat.image, echelle), extent = resultat.xlim + resultat.ylim, **parametres)
+    if stats is not None:
+        stats.top("rendu")
+    return artiste
+
+
+def dessiner_tache(ax, impacts, **kwargs):
+    """
+    Diagramme de tache d'un détecteur : angle des rayons en fonction de la position de leur impact le long du détecteur,
+    avec le barycentre et le rayon RMS de la tache (voir analyse.impacts_detecteur.resume).
+
+    ----------
+    ax : matplotlib axes
+        Axes sur lesquels tracer le diagramme.
+    impacts : analyse.impacts_detecteur
+        Impacts enregistrés sur le détecteur.
+    kwargs :
+        Paramètres transmis à ax.scatter (couleur, taille des points...)
+
+    Retourne le PathCollection des impacts.
+    """
+    resume = impacts.resume()
+    parametres = {"s": 2, "color": "k"}
+    parametres.update(kwargs)
+    points = ax.scatter(impacts.position(), impacts.teta, **parametres)
+    if resume["nombre"]:
+        ax.axvline(resume["position"], color = "C3")
+        ax.axvspan(resume["position"] - resume["rms"], resume["position"] + resume["rms"], color = "C3", alpha = 0.2)
+    ax.set_xlabel("position")
+    ax.set_ylabel("angle")
+    return points
+
+
+def dessiner_paraxial(ax, systeme, hauteurs, pentes = 0., x = None, longueur = 20., color = "C2", **kwargs):
+    """
+    Superpose au tracé exact le trajet paraxial de quelques rayons et les points cardinaux d'un paraxial.systeme_paraxial.
+
+    ----------
+    ax : matplotlib axes
+        Axes sur lesquels tracer.
+    systeme : paraxial.systeme_paraxial
+        Système dont les rayons et points cardinaux sont tracés.
+    hauteurs, pentes : array
+        Hauteurs et pentes des rayons en x.
+    x : float
+        Abscisse de départ des rayons (par défaut le plan d'entrée du système).
+    longueur : float
+        Distance parcourue par les rayons après le plan de sortie.
+    color : str
+        Couleur des rayons et des points.
+    kwargs :
+        Paramètres transmis à la LineCollection des rayons.
+
+    Retourne la LineCollection des rayons.
+    """
+    from matplotlib.collections import LineCollection
+
+    abscisses, ordonnees = systeme.rayon(hauteurs, pentes, x, longueur)
+    abscisses = np.broadcast_to(np.array(abscisses).reshape(-1, 1), ordonnees.reshape(len(abscisses), -1).shape)
+    lignes = np.stack([abscisses, ordonnees.reshape(len(abscisses), -1)], axis = -1).transpose(1, 0, 2)  #Une ligne brisée par rayon
+    parametres = {"colors": color, "linestyles": "dashed"}
+    parametres.update(kwargs)
+    collection = ax.add_collection(LineCollection(lignes, **parametres))
+
+    cardinaux = systeme.cardinaux()
+    for nom, marqueur in [("F", "o"), ("F_image", "o"), ("H", "|"), ("H_image", "|")]:
+        if np.isfinite(cardinaux[nom]):
+            ax.plot(cardinaux[nom], 0, marker = marqueur, color = color, markersize = 8)
+            ax.annotate(nom.replace("_image", "'"), (cardinaux[nom], 0), textcoords = "offset points", xytext = (3, 5), color = color)
+    return collection
+
+
+def points_contour(ax, surface):
+    #Nombre de points nécessaire pour tracer une surface sans facettes visibles au zoom actuel (un point tous les 2 pixels environ)
+    pixels = ax.transData.transform([(0, 0), (1, 1)])
+    echelle = np.max(np.abs(pixels[1] - pixels[0]))    #Pixels par unité
+    return int(np.clip(surface.longueur()*echelle/2, 16, 2000))
+
+
+def dessiner_surface(ax, surface, **kwargs):
+    """
+    Trace une surface (miroir ou sous_dioptre) et la rééchantillonne lorsque le zoom change.
+
+    ----------
+    ax : matplotlib axes
+        Axes sur lesquels tracer la surface.
+    surface : object
+        Surface possédant les méthodes contour(N) et longueur().
+    kwargs :
+        Paramètres transmis à ax.plot (couleur...)
+
+    Retourne la Line2D de la surface.
+    """
+    ligne, = ax.plot(*surface.contour(points_contour(ax, surface)), **kwargs)
+
+    def zoom(ax):
+        ligne.set_data(*surface.contour(points_contour(ax, surface)))
+
+    ax.callbacks.connect("xlim_changed", zoom)
+    return ligne
@@ -0,0 +1,107 @@
+"""
+Stockage des segments tracés dans un fichier binaire .npy (tableau structuré, un enregistrement par segment).
+Le fichier peut être ouvert en mémoire virtuelle (np.load(chemin, mmap_mode = "r")) : seules les parties
+lues sont chargées, ce qui permet de parcourir des résultats plus gros que la mémoire disponible.
+"""
+import struct
+
+import numpy as np
+
+from moteur import resultat_trace, CHAMPS
+
+#Un enregistrement par segment, sans alignement (62 octets)
+TYPE_SEGMENT = np.dtype([("x0", "<f8"), ("y0", "<f8"), ("x1", "<f8"), ("y1", "<f8"), ("teta", "<f8"),
+                         ("generation", "<i2"), ("surface", "<i4"), ("parent", "<i8"), ("longueur_onde", "<f8")])
+
+TAILLE_ENTETE = 256     #Taille fixe de l'en-tête .npy, qui peut ainsi être réécrit lorsque le nombre de segments change
+
+
+def tableau(resultat):
+    #Conversion d'un resultat_trace en tableau structuré
+    donnees = np.empty(len(resultat), dtype = TYPE_SEGMENT)
+    for champ in CHAMPS:
+        donnees[champ] = getattr(resultat, champ)
+    return donnees
+
+
+def resultat(donnees):
+    #Conversion d'un tableau structuré (ou d'une partie d'un fichier ouvert avec lire) en resultat_trace
+    #(les fichiers écrits avant l'ajout de longueur_onde n'ont pas cette colonne, la valeur par défaut est alors utilisée)
+    return resultat_trace(**{champ: donnees[champ] for champ in CHAMPS if champ in donnees.dtype.names})
+
+
+def entete(nombre):
+    #En-tête .npy (version 1.0) complété par des espaces jusqu'à TAILLE_ENTETE octets
+    texte = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.lib.format.dtype_to_descr(TYPE_SEGMENT), nombre)
+    texte = texte.ljust(TAILLE_ENTETE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", TAILLE_ENTETE - 10) + texte.encode("latin1")
+
+
+class fichier_segments:
+    """
+    Écriture des segments au fur et à mesure du tracé, sans les garder en mémoire.
+    Utilisable comme réducteur de moteur.scene.tracer_flux :
+
+        with fichier_segments("trace.npy") as fichier:
+            objet.tracer_flux([fichier])
+
+    ----------
+    chemin : str
+        Fichier .npy à créer.
+    """
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.nombre = 0     #Nombre de segments déjà écrits
+        self.fichier = open(chemin, "wb")
+        self.fichier.write(entete(0))
+
+    def ajouter(self, resultat):
+        donnees = tableau(resultat)
+        #Les parents d'un morceau sont numérotés à partir de son premier segment, on les décale à sa position dans le fichier
+        donnees["parent"] = np.where(donnees["parent"] >= 0, donnees["parent"] + self.nombre, -1)
+        self.fichier.write(donnees.tobytes())
+        self.nombre += len(donnees)
+
+    def fermer(self):
+        #Le nombre final de segments est inscrit dans l'en-tête
+        if self.fichier.closed:
+            return
+        self.fichier.seek(0)
+        self.fichier.write(entete(self.nombre))
+        self.fichier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erreur):
+        self.fermer()
+
+
+def enregistrer(chemin, resultat):
+    #Écriture d'un resultat_trace complet
+    with fichier_segments(chemin) as fichier:
+        fichier.ajouter(resultat)
+
+
+def lire(chemin, memoire = True):
+    """
+    Ouverture d'un fichier de segments.
+
+    ----------
+    chemin : str
+        Fichier .npy écrit par fichier_segments ou enregistrer.
+    memoire : bool
+        Ouverture en mémoire virtuelle (lecture seule, rien n'est chargé avant d'être utilisé).
+
+    Retourne le tableau structuré des segments, à découper puis convertir avec resultat().
+    """
+    return np.load(chemin, mmap_mode = "r" if memoire else None)
+
+
+def chemin_rayon(donnees, indice):
+    #Indices des segments parcourus par un rayon, de la source jusqu'au segment indice
+    lst_indice = []
+    while indice >= 0:
+        lst_indice.append(indice)
+        indice = int(donnees["parent"][indice])
+    return lst_indice[::-1]